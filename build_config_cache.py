@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script para precompilar el archivo .env en un módulo Python congelado.
+El servidor lo importa al arrancar en lugar de volver a parsear .env;
+si .env se modifica después, se ignora el caché hasta regenerarlo.
+"""
+
+import os
+from dotenv import dotenv_values
+
+from config import ENV_FILE, FROZEN_CONFIG_FILE, get_config
+
+
+def build_config_cache():
+    """Lee .env y escribe cache/config_frozen.py con los valores literales."""
+    if not os.path.exists(ENV_FILE):
+        print(f"❌ ERROR: No se encontró el archivo: {ENV_FILE}")
+        return
+
+    values = {k: v for k, v in dotenv_values(ENV_FILE).items() if v is not None}
+
+    # Validar que la configuración resultante es correcta antes de congelarla
+    config = get_config()
+    config.validate()
+
+    cache_dir = os.path.dirname(FROZEN_CONFIG_FILE) or "."
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{FROZEN_CONFIG_FILE}.tmp"
+    with open(tmp_path, "w") as frozen:
+        frozen.write("# Archivo generado por build_config_cache.py. No editar.\n")
+        frozen.write(f"DOTENV_VALUES = {values!r}\n")
+    os.replace(tmp_path, FROZEN_CONFIG_FILE)
+
+    config.print_config()
+    print(f"✅ Caché de configuración guardado en: {FROZEN_CONFIG_FILE}\n")
+
+
+if __name__ == "__main__":
+    build_config_cache()
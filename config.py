@@ -4,71 +4,167 @@ Selecciona automáticamente las credenciales y configuraciones según ENVIRONMEN
 """
 
 import os
+import importlib.util
+from functools import lru_cache
 from dotenv import load_dotenv
 
-load_dotenv()
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENV_FILE = os.path.join(BASE_DIR, ".env")
+# Relativo al proyecto (no al directorio de trabajo); CACHE_DIR absoluto se respeta
+FROZEN_CONFIG_FILE = os.path.join(
+    BASE_DIR, os.getenv("CACHE_DIR", "cache"), "config_frozen.py"
+)
+
+
+def _load_frozen_env() -> bool:
+    """
+    Carga las variables de .env desde el caché congelado generado por
+    build_config_cache.py. Retorna False si no existe o si .env es más reciente.
+    """
+    try:
+        if os.path.getmtime(FROZEN_CONFIG_FILE) < os.path.getmtime(ENV_FILE):
+            return False
+        spec = importlib.util.spec_from_file_location(
+            "config_frozen", FROZEN_CONFIG_FILE
+        )
+        frozen = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(frozen)
+        dotenv_values = frozen.DOTENV_VALUES
+    except Exception:
+        return False
+
+    # Mismo comportamiento que load_dotenv(override=False)
+    for key, value in dotenv_values.items():
+        os.environ.setdefault(key, value)
+    return True
+
+
+if not _load_frozen_env():
+    load_dotenv(override=False)
+
+
+# Variables que dependen del entorno (se leen como <VARIABLE>_PROD / <VARIABLE>_DEV)
+# Formato: (atributo, variable, valor por defecto)
+_ENV_SPEC = (
+    # Google Sheets
+    ("service_account_file", "SERVICE_ACCOUNT_FILE", "credentials.json"),
+    ("spreadsheet_id", "SPREADSHEET_ID", None),
+    # Google Calendar & Meet
+    ("client_secret_file", "CLIENT_SECRET_FILE", "meet-credentials.json"),
+    ("token_file", "TOKEN_FILE", "token.json"),
+    ("gcal_calendar_id", "GCAL_CALENDAR_ID", None),
+)
+
+# Ajustes numéricos de cachés y cuotas: (atributo, variable, valor por defecto, mínimo)
+_TUNING_SPEC = (
+    ("client_lookup_ttl", "CLIENT_LOOKUP_TTL", 10, 0),
+    ("sheet_cache_ttl", "SHEET_CACHE_TTL", 60, 0),
+    ("crm_index_ttl", "CRM_INDEX_TTL", 60, 0),
+    ("catalog_cache_ttl", "CATALOG_CACHE_TTL", 300, 0),
+    ("event_cache_ttl", "EVENT_CACHE_TTL", 30, 0),
+    ("sheets_max_retries", "SHEETS_MAX_RETRIES", 5, 0),
+    ("sheets_reads_per_minute", "SHEETS_READS_PER_MINUTE", 60, 1),
+    ("sheets_writes_per_minute", "SHEETS_WRITES_PER_MINUTE", 60, 1),
+    ("sheets_burst", "SHEETS_BURST", 10, 1),
+)
+
+
+def _env_int(env: dict, key: str, default: int, minimum: int) -> int:
+    """Lee un entero del entorno con un error claro si el valor no es válido."""
+    raw = env.get(key)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(
+            f"❌ ERROR: {key} debe ser un número entero (valor actual: {raw!r})"
+        ) from None
+    if value < minimum:
+        raise ValueError(
+            f"❌ ERROR: {key} debe ser >= {minimum} (valor actual: {value})"
+        )
+    return value
 
 
 class Config:
     """Clase de configuración que maneja entornos prod/dev automáticamente."""
 
+    __slots__ = (
+        "environment",
+        "service_account_file",
+        "spreadsheet_id",
+        "scopes",
+        "sheet_name",
+        "sheet_name_crm",
+        "sheet_name_catalog",
+        "sheet_name_meetings",
+        "sheet_name_projects",
+        "client_secret_file",
+        "token_file",
+        "gcal_calendar_id",
+        "mcp_server_port",
+        "timezone",
+        "cache_dir",
+        "log_dir",
+    ) + tuple(attr for attr, *_ in _TUNING_SPEC)
+
     def __init__(self):
         self.environment = os.getenv("ENVIRONMENT", "production").lower()
         self._load_environment_config()
 
     def _load_environment_config(self):
         """Carga configuración según el entorno activo."""
-        is_prod = self.environment == "production"
+        # Snapshot único del entorno: evita una llamada a os.getenv por variable
+        env = os.environ.copy()
+        sfx = "PROD" if self.environment == "production" else "DEV"
+
+        # Credenciales e IDs por entorno (ver _ENV_SPEC)
+        for attr, key, default in _ENV_SPEC:
+            setattr(self, attr, env.get(f"{key}_{sfx}", default))
 
         # ====================================================
         # Google Sheets Configuration
         # ====================================================
-        self.service_account_file = os.getenv(
-            f"SERVICE_ACCOUNT_FILE_{'PROD' if is_prod else 'DEV'}", "credentials.json"
-        )
-        self.spreadsheet_id = os.getenv(
-            f"SPREADSHEET_ID_{'PROD' if is_prod else 'DEV'}"
-        )
-        self.scopes = [
-            os.getenv("SCOPES", "https://www.googleapis.com/auth/spreadsheets")
+        self.scopes = [s for s in env.get("SCOPES", "").split(",") if s] or [
+            "https://www.googleapis.com/auth/spreadsheets"
         ]
 
         # Sheet names
-        self.sheet_name = os.getenv("SHEET_NAME", "Lead")
-        self.sheet_name_crm = os.getenv("SHEET_NAME_CRM", "Lead")
-        self.sheet_name_catalog = os.getenv("SHEET_NAME_CATALOG", "Services")
-        self.sheet_name_meetings = os.getenv("SHEET_NAME_MEETINGS", "Meetings")
-        self.sheet_name_projects = os.getenv("SHEET_NAME_PROJECTS", "Projects")
-
-        # ====================================================
-        # Google Calendar & Meet Configuration
-        # ====================================================
-        self.client_secret_file = os.getenv(
-            f"CLIENT_SECRET_FILE_{'PROD' if is_prod else 'DEV'}",
-            "meet-credentials.json",
-        )
-        self.token_file = os.getenv(
-            f"TOKEN_FILE_{'PROD' if is_prod else 'DEV'}", "token.json"
-        )
-        self.gcal_calendar_id = os.getenv(
-            f"GCAL_CALENDAR_ID_{'PROD' if is_prod else 'DEV'}"
-        )
+        self.sheet_name = env.get("SHEET_NAME", "Lead")
+        self.sheet_name_crm = env.get("SHEET_NAME_CRM", "Lead")
+        self.sheet_name_catalog = env.get("SHEET_NAME_CATALOG", "Services")
+        self.sheet_name_meetings = env.get("SHEET_NAME_MEETINGS", "Meetings")
+        self.sheet_name_projects = env.get("SHEET_NAME_PROJECTS", "Projects")
 
         # ====================================================
         # Server Configuration
         # ====================================================
-        self.mcp_server_port = int(os.getenv("MCP_SERVER_PORT", 8000))
-        self.timezone = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
+        self.mcp_server_port = int(env.get("MCP_SERVER_PORT", 8000))
+        self.timezone = env.get("TIMEZONE", "America/Argentina/Buenos_Aires")
 
         # ====================================================
         # Cache & Logs
         # ====================================================
-        self.cache_dir = os.getenv("CACHE_DIR", "./cache")
-        self.log_dir = os.getenv("LOG_DIR", "./logs")
-
-        # Crear directorios si no existen
-        os.makedirs(self.cache_dir, exist_ok=True)
-        os.makedirs(self.log_dir, exist_ok=True)
+        self.cache_dir = env.get("CACHE_DIR", "./cache")
+        self.log_dir = env.get("LOG_DIR", "./logs")
+
+        # TTLs de caché y límites de la API de Sheets (ver _TUNING_SPEC)
+        for attr, key, default, minimum in _TUNING_SPEC:
+            setattr(self, attr, _env_int(env, key, default, minimum))
+
+    def validate(self):
+        """Verifica que estén configuradas las variables obligatorias del entorno."""
+        if all((self.spreadsheet_id, self.gcal_calendar_id)):
+            return
+        env_name = self.environment.upper()
+        if not self.spreadsheet_id:
+            raise ValueError(
+                f"❌ ERROR: SPREADSHEET_ID_{env_name} no está configurado en .env"
+            )
+        raise ValueError(
+            f"❌ ERROR: GCAL_CALENDAR_ID_{env_name} no está configurado en .env"
+        )
 
     def is_production(self) -> bool:
         """Verifica si el entorno actual es producción."""
@@ -94,26 +190,20 @@ class Config:
         print(f"🔌 Puerto: {self.mcp_server_port}")
         print(f"🕐 Timezone: {self.timezone}")
         print(f"📂 Logs: {self.log_dir}")
+        for attr, key, *_ in _TUNING_SPEC:
+            print(f"⚙️  {key}: {getattr(self, attr)}")
         print("=" * 60 + "\n")
 
 
-# Instancia global de configuración
-config = Config()
-
-
-# Función helper para obtener configuración
+# Instancia global de configuración (se crea en el primer uso)
+@lru_cache(maxsize=1)
 def get_config() -> Config:
     """Retorna la instancia global de configuración."""
-    return config
+    config = Config()
 
+    # Crear directorios si no existen (sin syscall extra en arranques en caliente)
+    for directory in (config.cache_dir, config.log_dir):
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
 
-# Validación de configuración al importar
-if not config.spreadsheet_id:
-    raise ValueError(
-        f"❌ ERROR: SPREADSHEET_ID_{config.environment.upper()} no está configurado en .env"
-    )
-
-if not config.gcal_calendar_id:
-    raise ValueError(
-        f"❌ ERROR: GCAL_CALENDAR_ID_{config.environment.upper()} no está configurado en .env"
-    )
+    return config
@@ -1,47 +1,182 @@
 from fastmcp import FastMCP, Context
-from fastmcp.server.dependencies import get_context
 from services.google_sheet.crm_service import CRMService
 from services.google_sheet.catalog_service import CatalogService
 from services.google_sheet.meeting_service import MeetingService
 from services.google_sheet.project_service import ProjectService  # 👈 NUEVO
 from services.google_calendar_meet.calendar_service import CalendarService
-import os
+from services.google_sheet.sheets_client import HTTP_POOL_SIZE
+from config import get_config
+import asyncio
+import atexit
 import logging
-from dotenv import load_dotenv
+import orjson
+import os
+import queue
+import time
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, List
 from datetime import datetime
+from functools import lru_cache, partial
 
 # ====================================================
-# ⚙️ Cargar variables de entorno
+# ⚙️ Cargar configuración (variables de entorno + directorios)
 # ====================================================
-load_dotenv()
+config = get_config()
+# Falla al importar (también con `fastmcp run mcp.py:mcp`) si falta configuración
+config.validate()
 
 # ====================================================
 # 🧾 Logging
 # ====================================================
-log_dir = os.getenv("LOG_DIR", "./logs")
-os.makedirs(log_dir, exist_ok=True)
+log_dir = config.log_dir
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter que reutiliza el `strftime` de `asctime` dentro del mismo segundo."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_time = ""
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_time = time.strftime(
+                self.default_time_format, self.converter(record.created)
+            )
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+
+log_formatter = _CachedTimeFormatter("%(asctime)s - %(levelname)s - %(message)s")
+log_handlers = (
+    logging.FileHandler(f"{log_dir}/mcp_server.log", delay=True),
+    logging.StreamHandler(),
+)
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+# Las tools solo encolan registros; un hilo aparte hace la escritura a disco
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(f"{log_dir}/mcp_server.log"),
-        logging.StreamHandler(),
-    ],
+    format="%(message)s",
+    handlers=[QueueHandler(log_queue)],
 )
 logger = logging.getLogger(__name__)
 
+
+def _log_call(label: str, **kwargs) -> None:
+    """Registra la invocación de una tool en un único registro: `label | k=v, ...`."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    if kwargs:
+        logger.info("%s | %s", label, ", ".join(f"{k}={v}" for k, v in kwargs.items()))
+    else:
+        logger.info(label)
+
+
+# Pool propio para las llamadas bloqueantes a Google: el executor por defecto
+# de asyncio solo tiene min(32, CPUs + 4) hilos (5 en una instancia de 1 vCPU).
+# Se dimensiona igual que el pool de conexiones HTTP para no descartar conexiones.
+_google_api_executor = ThreadPoolExecutor(
+    max_workers=HTTP_POOL_SIZE, thread_name_prefix="google-api"
+)
+
+
+async def _run_blocking(fn, *args, **kwargs):
+    """Ejecuta una llamada bloqueante a los servicios fuera del event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _google_api_executor, partial(fn, *args, **kwargs)
+    )
+
+
+class _ClientUpdateBatcher:
+    """
+    Agrupa las actualizaciones de clientes que llegan en paralelo y las escribe
+    en Google Sheets con un solo `batch_update` cada `interval` segundos.
+    """
+
+    def __init__(self, max_batch: int = 32, interval: float = 0.05):
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue = None
+        self._task = None
+
+    async def submit(self, client_id: str, fields: dict) -> dict:
+        """Encola la actualización y espera el resultado de su batch."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._flush_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((client_id, fields, future))
+        return await future
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                results = await _run_blocking(
+                    CRMService.update_clients_batch,
+                    [(client_id, fields) for client_id, fields, _ in batch],
+                )
+            except Exception as e:
+                results = [{"success": False, "error": str(e)} for _ in batch]
+
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+client_update_batcher = _ClientUpdateBatcher()
+
+# verify_client se repite mucho dentro de una conversación: cacheo breve por
+# identificadores (solo se accede desde el event loop, no requiere lock)
+CLIENT_LOOKUP_TTL = config.client_lookup_ttl
+_client_lookup_cache = TTLCache(maxsize=2048, ttl=CLIENT_LOOKUP_TTL)
+
+
+def _invalidate_client_lookups() -> None:
+    """Descarta las búsquedas cacheadas tras cualquier escritura en la hoja de clientes."""
+    _client_lookup_cache.clear()
+
+
+# Canales de origen aceptados al crear un cliente
+VALID_CANALES = frozenset({"whatsapp", "web"})
+
+
+def _serialize_tool_result(data) -> str:
+    """Serializa el resultado de las tools con orjson (valores no JSON → str)."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # ====================================================
 # 🚀 Inicializar MCP
 # ====================================================
-mcp = FastMCP(name="CRM + Catalog + Meetings + Projects Server")
+mcp = FastMCP(
+    name="CRM + Catalog + Meetings + Projects Server",
+    tool_serializer=_serialize_tool_result,
+)
 
 
 # ====================================================
 # -----------------------
 # TOOL 1: VERIFY CLIENT
 # -----------------------
-@mcp.tool()
 async def verify_client(
     telefono: Optional[str] = None,
     correo: Optional[str] = None,
@@ -53,12 +188,16 @@ async def verify_client(
     Retorna información completa del cliente si se encuentra, incluyendo fechas de creación,
     conversión y thread_id.
     """
-    ctx = ctx or get_context()
-    logger.info(
-        f"🔍 verify_client | tel={telefono}, correo={correo}, usuario={usuario}"
-    )
-    result = CRMService.verify_client(telefono=telefono, correo=correo, usuario=usuario)
-    logger.info(f"📤 verify_client response: {result}")
+    _log_call("🔍 verify_client", tel=telefono, correo=correo, usuario=usuario)
+    key = (telefono, correo, usuario)
+    result = _client_lookup_cache.get(key)
+    if result is None:
+        result = await _run_blocking(
+            CRMService.verify_client, telefono=telefono, correo=correo, usuario=usuario
+        )
+        if "error" not in result:
+            _client_lookup_cache[key] = result
+    logger.info("📤 verify_client response: %s", result)
     return {"success": True, "data": result}
 
 
@@ -66,7 +205,6 @@ async def verify_client(
 # -----------------------
 # TOOL 2: CREATE CLIENT
 # -----------------------
-@mcp.tool()
 async def create_client(
     nombre: str,
     canal: str,
@@ -79,13 +217,21 @@ async def create_client(
     """
     Crea un nuevo cliente en el CRM (Google Sheets).
     No actualiza registros existentes; para eso se usa `update_client`.
+    `canal` debe ser "whatsapp" o "web".
     """
-    ctx = ctx or get_context()
-    logger.info(
-        f"✨ create_client | nombre={nombre}, canal={canal}, telefono={telefono}, correo={correo}"
+    _log_call(
+        "✨ create_client", nombre=nombre, canal=canal, telefono=telefono, correo=correo
     )
 
-    result = CRMService.create_client_service(
+    if not canal or canal.lower() not in VALID_CANALES:
+        return {
+            "success": False,
+            "created": False,
+            "error": f"Canal inválido '{canal}'. Valores permitidos: whatsapp, web",
+        }
+
+    result = await _run_blocking(
+        CRMService.create_client_service,
         nombre=nombre,
         canal=canal,
         telefono=telefono,
@@ -93,8 +239,9 @@ async def create_client(
         nota=nota,
         usuario=usuario,
     )
+    _invalidate_client_lookups()
 
-    logger.info(f"📤 create_client response: {result}")
+    logger.info("📤 create_client response: %s", result)
 
     return {
         "success": result.get("success", False),
@@ -107,7 +254,6 @@ async def create_client(
 # -----------------------
 # TOOL 3: UPDATE CLIENT
 # -----------------------
-@mcp.tool()
 async def update_client(
     client_id: str,
     fields: dict,
@@ -120,8 +266,7 @@ async def update_client(
     Campos disponibles: Nombre, Telefono, Correo, Tipo, Estado, Nota, Usuario, Canal,
     Fecha Creacion, Fecha Conversion, Thread_Id
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔄 update_client | client_id={client_id}, fields={fields}")
+    _log_call("🔄 update_client", client_id=client_id, fields=fields)
 
     if not fields:
         return {
@@ -130,11 +275,12 @@ async def update_client(
         }
 
     try:
-        result = CRMService.update_client_dynamic(client_id=client_id, fields=fields)
-        logger.info(f"📤 update_client response: {result}")
+        result = await client_update_batcher.submit(client_id, fields)
+        _invalidate_client_lookups()
+        logger.info("📤 update_client response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_client error: {str(e)}", exc_info=True)
+        logger.error("❌ update_client error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
@@ -142,22 +288,21 @@ async def update_client(
 # -----------------------
 # TOOL 4: UPDATE CLIENT NOTE
 # -----------------------
-@mcp.tool()
 async def update_client_note(client_id: str, nota: str, ctx: Context = None) -> dict:
     """
     Actualiza la nota de un cliente existente.
     El `client_id` puede ser UUID interno o el teléfono del cliente.
     """
-    ctx = ctx or get_context()
-    logger.info(f"✏️ update_client_note | client_id={client_id}")
+    _log_call("✏️ update_client_note", client_id=client_id)
     try:
-        result = CRMService.update_client_dynamic(
-            client_id=client_id, fields={"Nota": nota}
+        result = await _run_blocking(
+            CRMService.update_single_field, client_id, "Nota", nota
         )
-        logger.info(f"📤 update_client_note response: {result}")
+        _invalidate_client_lookups()
+        logger.info("📤 update_client_note response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_client_note error: {str(e)}", exc_info=True)
+        logger.error("❌ update_client_note error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
@@ -165,7 +310,6 @@ async def update_client_note(client_id: str, nota: str, ctx: Context = None) ->
 # -----------------------
 # TOOL 5: UPDATE CLIENT STATUS
 # -----------------------
-@mcp.tool()
 async def update_client_status(
     client_id: str, estado: str, ctx: Context = None
 ) -> dict:
@@ -173,16 +317,16 @@ async def update_client_status(
     Actualiza el estado de un cliente existente.
     El `client_id` puede ser UUID interno o el teléfono del cliente.
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔄 update_client_status | client_id={client_id}, estado={estado}")
+    _log_call("🔄 update_client_status", client_id=client_id, estado=estado)
     try:
-        result = CRMService.update_client_dynamic(
-            client_id=client_id, fields={"Estado": estado}
+        result = await _run_blocking(
+            CRMService.update_single_field, client_id, "Estado", estado
         )
-        logger.info(f"📤 update_client_status response: {result}")
+        _invalidate_client_lookups()
+        logger.info("📤 update_client_status response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_client_status error: {str(e)}", exc_info=True)
+        logger.error("❌ update_client_status error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
@@ -190,15 +334,13 @@ async def update_client_status(
 # -----------------------
 # TOOL 6: GET ALL SERVICES
 # -----------------------
-@mcp.tool()
 async def get_all_services(ctx: Context = None) -> dict:
     """
     Retorna todos los servicios disponibles en el catálogo.
     """
-    ctx = ctx or get_context()
-    logger.info("🔍 get_all_services")
-    result = CatalogService.get_all_services()
-    logger.info(f"📤 get_all_services response: {result}")
+    _log_call("🔍 get_all_services")
+    result = await _run_blocking(CatalogService.get_all_services)
+    logger.info("📤 get_all_services response: %s", result)
     return {"success": True, "data": result}
 
 
@@ -206,15 +348,13 @@ async def get_all_services(ctx: Context = None) -> dict:
 # -----------------------
 # TOOL 7: GET SERVICE BY NAME
 # -----------------------
-@mcp.tool()
 async def get_service_by_name(service_name: str, ctx: Context = None) -> dict:
     """
     Busca un servicio por su nombre en el catálogo.
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔍 get_service_by_name | service_name={service_name}")
-    result = CatalogService.get_service_by_name(service_name)
-    logger.info(f"📤 get_service_by_name response: {result}")
+    _log_call("🔍 get_service_by_name", service_name=service_name)
+    result = await _run_blocking(CatalogService.get_service_by_name, service_name)
+    logger.info("📤 get_service_by_name response: %s", result)
     return {"success": True, "data": result}
 
 
@@ -222,20 +362,20 @@ async def get_service_by_name(service_name: str, ctx: Context = None) -> dict:
 # -----------------------
 # TOOL 8: CALENDAR CHECK AVAILABILITY
 # -----------------------
-@mcp.tool()
 async def calendar_check_availability(ctx: Context = None) -> dict:
     """
     Consulta disponibilidad de calendario para crear eventos.
     """
-    ctx = ctx or get_context()
-    logger.info("🕓 calendar_check_availability")
+    _log_call("🕓 calendar_check_availability")
 
     try:
-        result = CalendarService.check_availability()
+        result = await _run_blocking(CalendarService.check_availability)
 
         # Maneja caso None o lista vacía
         if not result:
-            logger.warning("⚠️ CalendarService.check_availability devolvió vacío o None")
+            logger.warning(
+                "⚠️ CalendarService.check_availability devolvió vacío o None"
+            )
             return {
                 "success": True,
                 "message": "No hay disponibilidad en los próximos días hábiles.",
@@ -249,11 +389,27 @@ async def calendar_check_availability(ctx: Context = None) -> dict:
         return {"success": False, "error": str(e)}
 
 
+@lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """Parsea una fecha ISO; los horarios se repiten mucho entre llamadas."""
+    return datetime.fromisoformat(value)
+
+
+def _create_meet_event(summary, start_time, end_time, attendees, description):
+    """Parsea las fechas ISO y crea el evento; se ejecuta fuera del event loop."""
+    return CalendarService.create_meet_event(
+        summary=summary,
+        start_time=_parse_iso(start_time),
+        end_time=_parse_iso(end_time),
+        attendees=attendees,
+        description=description,
+    )
+
+
 # ====================================================
 # -----------------------
 # TOOL 9: CALENDAR CREATE MEET
 # -----------------------
-@mcp.tool()
 async def calendar_create_meet(
     summary: str,
     start_time: str,
@@ -265,16 +421,9 @@ async def calendar_create_meet(
     """
     Crea un evento de Google Meet en el calendario.
     """
-    ctx = ctx or get_context()
-    logger.info(f"📅 calendar_create_meet | summary={summary}")
-    start_dt = datetime.fromisoformat(start_time)
-    end_dt = datetime.fromisoformat(end_time)
-    meet_link = CalendarService.create_meet_event(
-        summary=summary,
-        start_time=start_dt,
-        end_time=end_dt,
-        attendees=attendees,
-        description=description,
+    _log_call("📅 calendar_create_meet", summary=summary)
+    meet_link = await _run_blocking(
+        _create_meet_event, summary, start_time, end_time, attendees, description
     )
     return {"success": True, "data": meet_link}
 
@@ -283,14 +432,12 @@ async def calendar_create_meet(
 # -----------------------
 # TOOL 10: GET EVENT DETAILS
 # -----------------------
-@mcp.tool()
 async def calendar_get_event_details(event_id: str, ctx: Context = None) -> dict:
     """
     Obtiene los detalles de un evento de calendario por su ID.
     """
-    ctx = ctx or get_context()
-    logger.info(f"📄 calendar_get_event_details | event_id={event_id}")
-    result = CalendarService.get_event_details(event_id)
+    _log_call("📄 calendar_get_event_details", event_id=event_id)
+    result = await _run_blocking(CalendarService.get_event_details, event_id)
     return {"success": True, "data": result}
 
 
@@ -302,7 +449,6 @@ async def calendar_get_event_details(event_id: str, ctx: Context = None) -> dict
 # -----------------------
 # TOOL 11: CREATE MEETING
 # -----------------------
-@mcp.tool()
 async def create_meeting_sheet(
     asunto: str,
     fecha_inicio: str,
@@ -325,11 +471,11 @@ async def create_meeting_sheet(
         calendar_id: ID del evento en Google Calendar (opcional)
         estado: Estado de la reunión (default: "Programada")
     """
-    ctx = ctx or get_context()
-    logger.info(f"📝 create_meeting | asunto={asunto}, cliente={id_cliente}")
+    _log_call("📝 create_meeting", asunto=asunto, cliente=id_cliente)
 
     try:
-        result = MeetingService.create_meeting(
+        result = await _run_blocking(
+            MeetingService.create_meeting,
             asunto=asunto,
             fecha_inicio=fecha_inicio,
             id_cliente=id_cliente,
@@ -338,17 +484,16 @@ async def create_meeting_sheet(
             calendar_id=calendar_id,
             estado=estado,
         )
-        logger.info(f"📤 create_meeting response: {result}")
+        logger.info("📤 create_meeting response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ create_meeting error: {str(e)}", exc_info=True)
+        logger.error("❌ create_meeting error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 12: GET MEETING BY ID
 # -----------------------
-@mcp.tool()
 async def get_meeting_sheet_by_id(meeting_id: str, ctx: Context = None) -> dict:
     """
     Consulta una reunión específica por su ID.
@@ -356,22 +501,20 @@ async def get_meeting_sheet_by_id(meeting_id: str, ctx: Context = None) -> dict:
     Args:
         meeting_id: ID único de la reunión
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔍 get_meeting_by_id | meeting_id={meeting_id}")
+    _log_call("🔍 get_meeting_by_id", meeting_id=meeting_id)
 
     try:
-        result = MeetingService.get_meeting_by_id(meeting_id)
-        logger.info(f"📤 get_meeting_by_id response: {result}")
+        result = await _run_blocking(MeetingService.get_meeting_by_id, meeting_id)
+        logger.info("📤 get_meeting_by_id response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_meeting_by_id error: {str(e)}", exc_info=True)
+        logger.error("❌ get_meeting_by_id error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 13: GET MEETINGS BY CLIENT
 # -----------------------
-@mcp.tool()
 async def get_meetings_sheet_by_client(id_cliente: str, ctx: Context = None) -> dict:
     """
     Consulta todas las reuniones asociadas a un cliente específico.
@@ -379,22 +522,20 @@ async def get_meetings_sheet_by_client(id_cliente: str, ctx: Context = None) ->
     Args:
         id_cliente: ID del cliente
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔍 get_meetings_by_client | id_cliente={id_cliente}")
+    _log_call("🔍 get_meetings_by_client", id_cliente=id_cliente)
 
     try:
-        result = MeetingService.get_meetings_by_client(id_cliente)
-        logger.info(f"📤 get_meetings_by_client response: {result}")
+        result = await _run_blocking(MeetingService.get_meetings_by_client, id_cliente)
+        logger.info("📤 get_meetings_by_client response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_meetings_by_client error: {str(e)}", exc_info=True)
+        logger.error("❌ get_meetings_by_client error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 14: GET MEETINGS BY DATE
 # -----------------------
-@mcp.tool()
 async def get_meetings_sheet_by_date(fecha_inicio: str, ctx: Context = None) -> dict:
     """
     Consulta todas las reuniones programadas para una fecha específica.
@@ -402,22 +543,20 @@ async def get_meetings_sheet_by_date(fecha_inicio: str, ctx: Context = None) ->
     Args:
         fecha_inicio: Fecha en formato YYYY-MM-DD
     """
-    ctx = ctx or get_context()
-    logger.info(f"📅 get_meetings_by_date | fecha={fecha_inicio}")
+    _log_call("📅 get_meetings_by_date", fecha=fecha_inicio)
 
     try:
-        result = MeetingService.get_meetings_by_date(fecha_inicio)
-        logger.info(f"📤 get_meetings_by_date response: {result}")
+        result = await _run_blocking(MeetingService.get_meetings_by_date, fecha_inicio)
+        logger.info("📤 get_meetings_by_date response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_meetings_by_date error: {str(e)}", exc_info=True)
+        logger.error("❌ get_meetings_by_date error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 15: UPDATE MEETING
 # -----------------------
-@mcp.tool()
 async def update_meeting_sheet(
     meeting_id: str,
     fields: dict,
@@ -433,8 +572,7 @@ async def update_meeting_sheet(
             "Meet", "Calendar", "Estado", "Id Cliente"
             Ejemplo: {"Estado": "Completada", "Meet": "https://meet.google.com/xyz"}
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔄 update_meeting | meeting_id={meeting_id}, fields={fields}")
+    _log_call("🔄 update_meeting", meeting_id=meeting_id, fields=fields)
 
     if not fields:
         return {
@@ -443,18 +581,19 @@ async def update_meeting_sheet(
         }
 
     try:
-        result = MeetingService.update_meeting(meeting_id=meeting_id, fields=fields)
-        logger.info(f"📤 update_meeting response: {result}")
+        result = await _run_blocking(
+            MeetingService.update_meeting, meeting_id=meeting_id, fields=fields
+        )
+        logger.info("📤 update_meeting response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_meeting error: {str(e)}", exc_info=True)
+        logger.error("❌ update_meeting error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 16: DELETE MEETING
 # -----------------------
-@mcp.tool()
 async def delete_meeting_sheet(meeting_id: str, ctx: Context = None) -> dict:
     """
     Elimina una reunión de la hoja de Meetings.
@@ -462,15 +601,14 @@ async def delete_meeting_sheet(meeting_id: str, ctx: Context = None) -> dict:
     Args:
         meeting_id: ID de la reunión a eliminar
     """
-    ctx = ctx or get_context()
-    logger.info(f"🗑️ delete_meeting | meeting_id={meeting_id}")
+    _log_call("🗑️ delete_meeting", meeting_id=meeting_id)
 
     try:
-        result = MeetingService.delete_meeting(meeting_id)
-        logger.info(f"📤 delete_meeting response: {result}")
+        result = await _run_blocking(MeetingService.delete_meeting, meeting_id)
+        logger.info("📤 delete_meeting response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ delete_meeting error: {str(e)}", exc_info=True)
+        logger.error("❌ delete_meeting error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
@@ -482,7 +620,6 @@ async def delete_meeting_sheet(meeting_id: str, ctx: Context = None) -> dict:
 # -----------------------
 # TOOL 17: CREATE PROJECT
 # -----------------------
-@mcp.tool()
 async def create_project_sheet(
     nombre: str,
     id_cliente: str,
@@ -507,11 +644,11 @@ async def create_project_sheet(
         estado: Estado del proyecto (default: "En Progreso")
         nota: Notas adicionales
     """
-    ctx = ctx or get_context()
-    logger.info(f"📝 create_project | nombre={nombre}, cliente={id_cliente}")
+    _log_call("📝 create_project", nombre=nombre, cliente=id_cliente)
 
     try:
-        result = ProjectService.create_project(
+        result = await _run_blocking(
+            ProjectService.create_project,
             nombre=nombre,
             id_cliente=id_cliente,
             servicio=servicio,
@@ -521,17 +658,16 @@ async def create_project_sheet(
             estado=estado,
             nota=nota,
         )
-        logger.info(f"📤 create_project response: {result}")
+        logger.info("📤 create_project response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ create_project error: {str(e)}", exc_info=True)
+        logger.error("❌ create_project error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 18: GET PROJECT BY ID
 # -----------------------
-@mcp.tool()
 async def get_project_sheet_by_id(project_id: str, ctx: Context = None) -> dict:
     """
     Consulta un proyecto específico por su ID.
@@ -539,22 +675,20 @@ async def get_project_sheet_by_id(project_id: str, ctx: Context = None) -> dict:
     Args:
         project_id: ID único del proyecto
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔍 get_project_by_id | project_id={project_id}")
+    _log_call("🔍 get_project_by_id", project_id=project_id)
 
     try:
-        result = ProjectService.get_project_by_id(project_id)
-        logger.info(f"📤 get_project_by_id response: {result}")
+        result = await _run_blocking(ProjectService.get_project_by_id, project_id)
+        logger.info("📤 get_project_by_id response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_project_by_id error: {str(e)}", exc_info=True)
+        logger.error("❌ get_project_by_id error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 19: GET PROJECTS BY CLIENT
 # -----------------------
-@mcp.tool()
 async def get_projects_sheet_by_client(id_cliente: str, ctx: Context = None) -> dict:
     """
     Consulta todos los proyectos asociados a un cliente específico.
@@ -562,22 +696,20 @@ async def get_projects_sheet_by_client(id_cliente: str, ctx: Context = None) ->
     Args:
         id_cliente: ID del cliente
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔍 get_projects_by_client | id_cliente={id_cliente}")
+    _log_call("🔍 get_projects_by_client", id_cliente=id_cliente)
 
     try:
-        result = ProjectService.get_projects_by_client(id_cliente)
-        logger.info(f"📤 get_projects_by_client response: {result}")
+        result = await _run_blocking(ProjectService.get_projects_by_client, id_cliente)
+        logger.info("📤 get_projects_by_client response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_projects_by_client error: {str(e)}", exc_info=True)
+        logger.error("❌ get_projects_by_client error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 20: GET PROJECTS BY DATE
 # -----------------------
-@mcp.tool()
 async def get_projects_sheet_by_date(fecha_inicio: str, ctx: Context = None) -> dict:
     """
     Consulta todos los proyectos que inician en una fecha específica.
@@ -585,22 +717,20 @@ async def get_projects_sheet_by_date(fecha_inicio: str, ctx: Context = None) ->
     Args:
         fecha_inicio: Fecha en formato YYYY-MM-DD
     """
-    ctx = ctx or get_context()
-    logger.info(f"📅 get_projects_by_date | fecha={fecha_inicio}")
+    _log_call("📅 get_projects_by_date", fecha=fecha_inicio)
 
     try:
-        result = ProjectService.get_projects_by_date(fecha_inicio)
-        logger.info(f"📤 get_projects_by_date response: {result}")
+        result = await _run_blocking(ProjectService.get_projects_by_date, fecha_inicio)
+        logger.info("📤 get_projects_by_date response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ get_projects_by_date error: {str(e)}", exc_info=True)
+        logger.error("❌ get_projects_by_date error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 21: UPDATE PROJECT
 # -----------------------
-@mcp.tool()
 async def update_project_sheet(
     project_id: str,
     fields: dict,
@@ -616,8 +746,7 @@ async def update_project_sheet(
             "Nota", "Fecha_Inicio", "Fecha_Fin", "Id_Cliente"
             Ejemplo: {"Estado": "Completado", "Nota": "Proyecto finalizado"}
     """
-    ctx = ctx or get_context()
-    logger.info(f"🔄 update_project | project_id={project_id}, fields={fields}")
+    _log_call("🔄 update_project", project_id=project_id, fields=fields)
 
     if not fields:
         return {
@@ -626,18 +755,19 @@ async def update_project_sheet(
         }
 
     try:
-        result = ProjectService.update_project(project_id=project_id, fields=fields)
-        logger.info(f"📤 update_project response: {result}")
+        result = await _run_blocking(
+            ProjectService.update_project, project_id=project_id, fields=fields
+        )
+        logger.info("📤 update_project response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_project error: {str(e)}", exc_info=True)
+        logger.error("❌ update_project error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 22: UPDATE PROJECT NOTE BY CLIENT
 # -----------------------
-@mcp.tool()
 async def update_project_note_by_client(
     id_cliente: str,
     nota: str,
@@ -650,24 +780,24 @@ async def update_project_note_by_client(
         id_cliente: ID del cliente cuyos proyectos se actualizarán
         nota: Nueva nota a agregar a todos los proyectos del cliente
     """
-    ctx = ctx or get_context()
-    logger.info(f"✏️ update_project_note_by_client | id_cliente={id_cliente}")
+    _log_call("✏️ update_project_note_by_client", id_cliente=id_cliente)
 
     try:
-        result = ProjectService.update_project_note_by_client(
-            id_cliente=id_cliente, nota=nota
+        result = await _run_blocking(
+            ProjectService.update_project_note_by_client,
+            id_cliente=id_cliente,
+            nota=nota,
         )
-        logger.info(f"📤 update_project_note_by_client response: {result}")
+        logger.info("📤 update_project_note_by_client response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ update_project_note_by_client error: {str(e)}", exc_info=True)
+        logger.error("❌ update_project_note_by_client error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
 # -----------------------
 # TOOL 23: DELETE PROJECT
 # -----------------------
-@mcp.tool()
 async def delete_project_sheet(project_id: str, ctx: Context = None) -> dict:
     """
     Elimina un proyecto de la hoja de Projects.
@@ -675,24 +805,96 @@ async def delete_project_sheet(project_id: str, ctx: Context = None) -> dict:
     Args:
         project_id: ID del proyecto a eliminar
     """
-    ctx = ctx or get_context()
-    logger.info(f"🗑️ delete_project | project_id={project_id}")
+    _log_call("🗑️ delete_project", project_id=project_id)
 
     try:
-        result = ProjectService.delete_project(project_id)
-        logger.info(f"📤 delete_project response: {result}")
+        result = await _run_blocking(ProjectService.delete_project, project_id)
+        logger.info("📤 delete_project response: %s", result)
         return {"success": True, "data": result}
     except Exception as e:
-        logger.error(f"❌ delete_project error: {str(e)}", exc_info=True)
+        logger.error("❌ delete_project error: %s", e, exc_info=True)
         return {"success": False, "error": str(e)}
 
 
+# ====================================================
+# 🧺 BATCH
+# ====================================================
+
+
+# -----------------------
+# TOOL 24: BATCH
+# -----------------------
+async def batch(calls: List[dict], ctx: Context = None) -> dict:
+    """
+    Ejecuta varias tools independientes en paralelo en una sola llamada.
+
+    Args:
+        calls: Lista de invocaciones `{"name": "<tool>", "args": {...}}`.
+            Ejemplo: [{"name": "verify_client", "args": {"telefono": "123456"}}]
+
+    Retorna los resultados en el mismo orden que `calls`.
+    """
+    _log_call("🧺 batch", calls=len(calls))
+
+    async def run(call: dict) -> dict:
+        name = call.get("name")
+        tool = _TOOLS_BY_NAME.get(name)
+        if tool is None:
+            return {"success": False, "error": f"Tool desconocida '{name}'"}
+        try:
+            return await tool(**(call.get("args") or {}))
+        except Exception as e:
+            logger.error("❌ batch %s error: %s", name, e, exc_info=True)
+            return {"success": False, "error": str(e)}
+
+    results = await asyncio.gather(*(run(call) for call in calls))
+    return {"success": True, "data": results}
+
+
+# ====================================================
+# 🧰 REGISTRO DE TOOLS
+# ====================================================
+# Se registran todas en un único punto, en el orden en que se exponen
+TOOLS = [
+    verify_client,
+    create_client,
+    update_client,
+    update_client_note,
+    update_client_status,
+    get_all_services,
+    get_service_by_name,
+    calendar_check_availability,
+    calendar_create_meet,
+    calendar_get_event_details,
+    create_meeting_sheet,
+    get_meeting_sheet_by_id,
+    get_meetings_sheet_by_client,
+    get_meetings_sheet_by_date,
+    update_meeting_sheet,
+    delete_meeting_sheet,
+    create_project_sheet,
+    get_project_sheet_by_id,
+    get_projects_sheet_by_client,
+    get_projects_sheet_by_date,
+    update_project_sheet,
+    update_project_note_by_client,
+    delete_project_sheet,
+]
+
+# Tools que `batch` puede invocar (todas salvo ella misma)
+_TOOLS_BY_NAME = {tool.__name__: tool for tool in TOOLS}
+TOOLS.append(batch)
+
+for tool in TOOLS:
+    mcp.tool()(tool)
+
+
 # ====================================================
 # 🚀 RUN SERVER
 # ====================================================
 if __name__ == "__main__":
     import uvicorn
 
-    port = int(os.getenv("MCP_SERVER_PORT", 8000))
-    logger.info(f"🚀 Iniciando MCP Server en puerto {port}...")
+    port = config.mcp_server_port
+    logger.info("🚀 Iniciando MCP Server en puerto %s...", port)
     uvicorn.run("mcp_server:app", host="0.0.0.0", port=port, log_level="info")
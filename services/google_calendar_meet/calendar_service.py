@@ -1,25 +1,93 @@
 # services/google_calendar_meet/calendar_service.py
 import os
-import json
+import stat
+import itertools
 import logging
-import pytz
+import orjson
+import threading
+from cachetools import TTLCache
 from datetime import datetime, timedelta, time
-from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+from config import get_config
+from google.auth.exceptions import RefreshError
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
+_TZ = ZoneInfo(TIMEZONE)
+_from_iso = datetime.fromisoformat
+
+# Duración mínima de un espacio libre para ofrecerlo
+_MIN_FREE_SLOT = timedelta(minutes=15)
+
+# requestId de conferencias: prefijo aleatorio por proceso + contador
+_REQUEST_ID_PREFIX = os.urandom(4).hex()
+_request_counter = itertools.count(1)
+
+# Partes fijas del body de `events.insert` (se comparten entre llamadas, no se mutan)
+_DEFAULT_DESCRIPTION = "Evento creado automáticamente con Meet."
+_MEET_SOLUTION_KEY = {"type": "hangoutsMeet"}
+
+
+def _fmt12(dt: datetime) -> str:
+    """Equivalente a `dt.strftime("%I:%M %p")` sin pasar por strftime."""
+    hour = dt.hour
+    return f"{hour % 12 or 12:02d}:{dt.minute:02d} {'AM' if hour < 12 else 'PM'}"
+
 
 # ⚠️ Scopes fijos para Calendar/Meet
-SCOPES = [
+SCOPES = (
     "https://www.googleapis.com/auth/calendar",
     "https://www.googleapis.com/auth/calendar.events",
     "https://www.googleapis.com/auth/calendar.readonly",
     "https://www.googleapis.com/auth/meetings.space.created",
-]
+)
+
+
+# httplib2.Http no es thread-safe: cada hilo reutiliza su propia conexión keep-alive
+_thread_local = threading.local()
+_service_lock = threading.Lock()
+# Un solo hilo refresca el access token vencido; el resto espera y lo reutiliza
+_refresh_lock = threading.Lock()
+
+# Detalles de eventos: el LLM suele repetir la misma consulta en pocos segundos
+EVENT_CACHE_TTL = get_config().event_cache_ttl
+_event_cache = TTLCache(maxsize=1024, ttl=EVENT_CACHE_TTL)
+_event_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _orjson_model_class():
+    """
+    JsonModel de googleapiclient que (de)serializa los bodies con orjson.
+    Se define al primer uso para no importar googleapiclient con el módulo.
+    """
+    from googleapiclient.model import JsonModel
+
+    class _OrjsonModel(JsonModel):
+        def serialize(self, body_value):
+            if (
+                isinstance(body_value, dict)
+                and "data" not in body_value
+                and self._data_wrapper
+            ):
+                body_value = {"data": body_value}
+            return orjson.dumps(body_value).decode()
+
+        def deserialize(self, content):
+            try:
+                body = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                return (
+                    content.decode("utf-8") if isinstance(content, bytes) else content
+                )
+            if self._data_wrapper and "data" in body:
+                body = body["data"]
+            return body
+
+    return _OrjsonModel
 
 
 class CalendarService:
@@ -35,40 +103,135 @@ class CalendarService:
         else:
             path = os.getenv("TOKEN_FILE_PROD", "secrets/token-prod.json")
 
-        logger.info(f"🧩 Entorno detectado: {env} → usando token: {path}")
+        logger.info("🧩 Entorno detectado: %s → usando token: %s", env, path)
         return path
 
     # -------------------------------------------------
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_credentials():
-        """Carga las credenciales internas del servidor sin flujo OAuth."""
+        """
+        Carga las credenciales internas del servidor sin flujo OAuth.
+        Se leen del disco una sola vez; `reset()` invalida el caché.
+        """
+        # Import diferido: no pesa en el arranque del servidor MCP
+        from google.oauth2.credentials import Credentials
+
         token_path = CalendarService.get_token_path()
 
         if not os.path.exists(token_path):
             raise FileNotFoundError(f"❌ No existe el token interno: {token_path}")
 
         # Leer archivo y validar contenido
-        with open(token_path, "r") as token_file:
-            content = token_file.read().strip()
-            if not content:
-                raise ValueError(f"⚠️ El token {token_path} está vacío o corrupto.")
-            try:
-                creds_data = json.loads(content)
-            except json.JSONDecodeError:
-                raise ValueError(
-                    f"⚠️ El token {token_path} tiene formato JSON inválido."
-                )
+        content = Path(token_path).read_bytes().strip()
+        if not content:
+            raise ValueError(f"⚠️ El token {token_path} está vacío o corrupto.")
+        try:
+            creds_data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            raise ValueError(f"⚠️ El token {token_path} tiene formato JSON inválido.")
 
         creds = Credentials.from_authorized_user_info(creds_data, SCOPES)
         return creds
 
+    # -------------------------------------------------
+    @staticmethod
+    def reset():
+        """Descarta las credenciales y el servicio cacheados (p. ej. tras un RefreshError)."""
+        with _service_lock:
+            CalendarService._service = None
+            CalendarService.get_credentials.cache_clear()
+
+    # -------------------------------------------------
+    @staticmethod
+    def _ensure_fresh_credentials():
+        """Refresca el access token si venció, una sola vez para todos los hilos."""
+        creds = CalendarService.get_credentials()
+        if creds.valid:
+            return
+        with _refresh_lock:
+            if creds.valid:
+                return
+            import httplib2
+            from google_auth_httplib2 import Request
+
+            creds.refresh(Request(httplib2.Http()))
+            CalendarService._persist_token(creds)
+
+    # -------------------------------------------------
+    @staticmethod
+    def _persist_token(creds):
+        """
+        Guarda el token refrescado de forma atómica (tmp + os.replace). El archivo
+        nuevo conserva los permisos del token actual (0600 si no existía), para no
+        dejar el refresh token legible por otros usuarios.
+        """
+        token_path = CalendarService.get_token_path()
+        tmp_path = f"{token_path}.tmp"
+        try:
+            try:
+                mode = stat.S_IMODE(os.stat(token_path).st_mode)
+            except FileNotFoundError:
+                mode = 0o600
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as tmp:
+                os.fchmod(tmp.fileno(), mode)
+                tmp.write(creds.to_json())
+            os.replace(tmp_path, token_path)
+        except OSError as e:
+            # p. ej. secretos montados como solo lectura: el token sigue en memoria
+            logger.warning("⚠️ No se pudo guardar el token refrescado: %s", e)
+
+    # -------------------------------------------------
+    @staticmethod
+    def _execute(request):
+        """Ejecuta un request de la API; si el token no se puede refrescar, invalida el caché."""
+        try:
+            CalendarService._ensure_fresh_credentials()
+            return request.execute()
+        except RefreshError:
+            CalendarService.reset()
+            raise
+
+    # -------------------------------------------------
+    @staticmethod
+    def _thread_http(creds):
+        """Retorna el cliente HTTP autenticado del hilo actual (uno por hilo)."""
+        cached = getattr(_thread_local, "http", None)
+        if cached is None or cached[0] is not creds:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+
+            cached = (creds, AuthorizedHttp(creds, http=httplib2.Http()))
+            _thread_local.http = cached
+        return cached[1]
+
     # -------------------------------------------------
     @staticmethod
     def get_service():
         """Singleton del servicio de Calendar autenticado internamente."""
         if CalendarService._service is None:
-            creds = CalendarService.get_credentials()
-            CalendarService._service = build("calendar", "v3", credentials=creds)
+            with _service_lock:
+                if CalendarService._service is None:
+                    # Import diferido del cliente de discovery (el más costoso)
+                    from googleapiclient.discovery import build
+                    from googleapiclient.http import HttpRequest
+
+                    creds = CalendarService.get_credentials()
+
+                    def build_request(_http, *args, **kwargs):
+                        # Cada request usa la conexión persistente de su hilo
+                        http = CalendarService._thread_http(creds)
+                        return HttpRequest(http, *args, **kwargs)
+
+                    CalendarService._service = build(
+                        "calendar",
+                        "v3",
+                        http=CalendarService._thread_http(creds),
+                        model=_orjson_model_class()(),
+                        requestBuilder=build_request,
+                        static_discovery=True,
+                    )
         return CalendarService._service
 
     # -------------------------------------------------
@@ -78,7 +241,7 @@ class CalendarService:
     ):
         """Crea un evento con enlace de Meet usando token interno y valida disponibilidad."""
         service = CalendarService.get_service()
-        tz = pytz.timezone(TIMEZONE)
+        tz = _TZ
 
         # Convertir a datetime con tz si no lo están
         if isinstance(start_time, datetime):
@@ -91,17 +254,18 @@ class CalendarService:
         else:
             end_time = datetime.fromisoformat(end_time).astimezone(tz)
 
+        start_iso = start_time.isoformat()
+        end_iso = end_time.isoformat()
+
         # 🔹 Validar disponibilidad
-        result = (
-            service.freebusy()
-            .query(
+        result = CalendarService._execute(
+            service.freebusy().query(
                 body={
-                    "timeMin": start_time.isoformat(),
-                    "timeMax": end_time.isoformat(),
+                    "timeMin": start_iso,
+                    "timeMax": end_iso,
                     "items": [{"id": "primary"}],
                 }
             )
-            .execute()
         )
         busy_slots = result["calendars"]["primary"].get("busy", [])
         if busy_slots:
@@ -114,22 +278,22 @@ class CalendarService:
         # Crear evento
         event = {
             "summary": summary,
-            "description": description or "Evento creado automáticamente con Meet.",
-            "start": {"dateTime": start_time.isoformat(), "timeZone": TIMEZONE},
-            "end": {"dateTime": end_time.isoformat(), "timeZone": TIMEZONE},
+            "description": description or _DEFAULT_DESCRIPTION,
+            "start": {"dateTime": start_iso, "timeZone": TIMEZONE},
+            "end": {"dateTime": end_iso, "timeZone": TIMEZONE},
             "conferenceData": {
                 "createRequest": {
-                    "requestId": f"meet-{os.urandom(4).hex()}",
-                    "conferenceSolutionKey": {"type": "hangoutsMeet"},
+                    "requestId": f"meet-{_REQUEST_ID_PREFIX}-{next(_request_counter):x}",
+                    "conferenceSolutionKey": _MEET_SOLUTION_KEY,
                 }
             },
             "attendees": [{"email": e} for e in (attendees or [])],
         }
 
-        event = (
-            service.events()
-            .insert(calendarId="primary", body=event, conferenceDataVersion=1)
-            .execute()
+        event = CalendarService._execute(
+            service.events().insert(
+                calendarId="primary", body=event, conferenceDataVersion=1
+            )
         )
 
         event_id = event["id"]
@@ -137,8 +301,10 @@ class CalendarService:
             event.get("conferenceData", {}).get("entryPoints", [{}])[0].get("uri")
         )
         calendar_link = event.get("htmlLink")
+        with _event_lock:
+            _event_cache.pop(event_id, None)
 
-        logger.info(f"✅ Evento creado | ID: {event_id} | Link: {calendar_link}")
+        logger.info("✅ Evento creado | ID: %s | Link: %s", event_id, calendar_link)
 
         return {
             "success": True,
@@ -153,21 +319,43 @@ class CalendarService:
     def check_availability():
         """Retorna los espacios libres entre 8 a.m. y 5 p.m. de los próximos 3 días hábiles."""
         service = CalendarService.get_service()
-        tz = pytz.timezone(TIMEZONE)
+        tz = _TZ
         now = datetime.now(tz)
 
         def day_range(offset):
             date = now.date() + timedelta(days=offset)
-            start_day = datetime.combine(date, time(8, 0)).replace(tzinfo=tz)
-            end_day = datetime.combine(date, time(17, 0)).replace(tzinfo=tz)
+            start_day = datetime.combine(date, time(8, 0), tzinfo=tz)
+            end_day = datetime.combine(date, time(17, 0), tzinfo=tz)
             label = date.strftime("%A %d/%m/%Y")
             return start_day, end_day, label
 
+        # Una sola consulta freebusy para toda la ventana (hasta las 17:00 del último día)
+        max_days = 14
+        _, window_end, _ = day_range(max_days - 1)
+        result = CalendarService._execute(
+            service.freebusy().query(
+                body={
+                    "timeMin": now.isoformat(),
+                    "timeMax": max(now, window_end).isoformat(),
+                    "items": [{"id": "primary"}],
+                }
+            )
+        )
+        from_iso = _from_iso
+        busy = sorted(
+            (
+                from_iso(slot["start"]).astimezone(tz),
+                from_iso(slot["end"]).astimezone(tz),
+            )
+            for slot in result["calendars"]["primary"].get("busy", [])
+        )
+
         disponibilidad = []
         offset = 0
         dias_encontrados = 0
+        first = 0  # primer intervalo ocupado que puede afectar al día actual
 
-        while dias_encontrados < 3 and offset < 14:
+        while dias_encontrados < 3 and offset < max_days:
             date = now.date() + timedelta(days=offset)
 
             if date.weekday() >= 5:  # Saltar sábados y domingos
@@ -181,26 +369,17 @@ class CalendarService:
                 offset += 1
                 continue
 
-            result = (
-                service.freebusy()
-                .query(
-                    body={
-                        "timeMin": start.isoformat(),
-                        "timeMax": end_day.isoformat(),
-                        "items": [{"id": "primary"}],
-                    }
-                )
-                .execute()
-            )
+            while first < len(busy) and busy[first][1] <= start:
+                first += 1
 
-            busy_slots = result["calendars"]["primary"].get("busy", [])
             free_slots = []
             current_time = start
 
-            for slot in busy_slots:
-                s = datetime.fromisoformat(slot["start"]).astimezone(tz)
-                e = datetime.fromisoformat(slot["end"]).astimezone(tz)
-                if e <= start or s >= end_day:
+            for i in range(first, len(busy)):
+                s, e = busy[i]
+                if s >= end_day:
+                    break
+                if e <= start:
                     continue
                 if current_time < s:
                     free_slots.append((current_time, s))
@@ -211,13 +390,13 @@ class CalendarService:
 
             slots_fmt = [
                 {
-                    "inicio": s.strftime("%I:%M %p"),
-                    "fin": e.strftime("%I:%M %p"),
+                    "inicio": _fmt12(s),
+                    "fin": _fmt12(e),
                     "inicio_iso": s.isoformat(),
                     "fin_iso": e.isoformat(),
                 }
                 for s, e in free_slots
-                if (e - s).total_seconds() >= 900
+                if e - s >= _MIN_FREE_SLOT
             ]
 
             if slots_fmt:
@@ -231,13 +410,18 @@ class CalendarService:
     # -------------------------------------------------
     @staticmethod
     def get_event_details(event_id: str):
-        """Obtiene los detalles de un evento dado su event_id."""
+        """Obtiene los detalles de un evento dado su event_id (con caché TTL)."""
+        with _event_lock:
+            details = _event_cache.get(event_id)
+        if details is not None:
+            return details
+
         service = CalendarService.get_service()
         try:
-            event = (
-                service.events().get(calendarId="primary", eventId=event_id).execute()
+            event = CalendarService._execute(
+                service.events().get(calendarId="primary", eventId=event_id)
             )
-            tz = pytz.timezone(TIMEZONE)
+            tz = _TZ
 
             start = datetime.fromisoformat(event["start"].get("dateTime")).astimezone(
                 tz
@@ -248,7 +432,7 @@ class CalendarService:
                 event.get("conferenceData", {}).get("entryPoints", [{}])[0].get("uri")
             )
 
-            return {
+            details = {
                 "event_id": event["id"],
                 "summary": event["summary"],
                 "description": event.get("description"),
@@ -260,3 +444,8 @@ class CalendarService:
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+        # Solo se cachean respuestas exitosas
+        with _event_lock:
+            _event_cache[event_id] = details
+        return details
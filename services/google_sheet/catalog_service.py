@@ -1,41 +1,63 @@
-import gspread
-from google.oauth2.service_account import Credentials
+from cachetools import TTLCache
+import threading
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
-SCOPES = [os.getenv("SCOPES", "https://www.googleapis.com/auth/spreadsheets")]
+from config import get_config
+from services.google_sheet.sheets_client import (
+    get_worksheet,
+    reset_worksheet_on_error,
+)
 
 # Usar la hoja correcta del catálogo
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")  # Puede ser la misma que CRM
 SHEET_NAME = os.getenv("SHEET_NAME_CATALOG", "Services")  # <- Aquí cambió
 
-creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-gc = gspread.authorize(creds)
+# El catálogo cambia poco: se cachea en memoria durante CATALOG_CACHE_TTL segundos
+CATALOG_CACHE_TTL = get_config().catalog_cache_ttl
+
+_catalog_cache = TTLCache(maxsize=1, ttl=CATALOG_CACHE_TTL)
+_catalog_lock = threading.Lock()
 
 
 class CatalogService:
+    @staticmethod
+    def _get_catalog() -> tuple:
+        """Retorna (registros, índice por nombre en minúsculas), usando el caché."""
+        with _catalog_lock:
+            catalog = _catalog_cache.get("catalog")
+        if catalog is None:
+            worksheet = get_worksheet(SPREADSHEET_ID, SHEET_NAME)
+            all_records = worksheet.get_all_records()
+            by_name = {}
+            for row in all_records:
+                by_name.setdefault(str(row.get("Nombre")).lower(), row)
+            catalog = (all_records, by_name)
+            with _catalog_lock:
+                _catalog_cache["catalog"] = catalog
+        return catalog
+
+    @staticmethod
+    def clear_cache():
+        """Invalida el caché del catálogo (usar tras modificar la hoja)."""
+        with _catalog_lock:
+            _catalog_cache.clear()
+
     @staticmethod
     def get_all_services() -> dict:
         try:
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME)
-            all_records = worksheet.get_all_records()
+            all_records, _ = CatalogService._get_catalog()
             return {"success": True, "services": all_records}
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
     def get_service_by_name(service_name: str) -> dict:
         try:
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME)
-            all_records = worksheet.get_all_records()
-            for row in all_records:
-                if str(row.get("Nombre")).lower() == service_name.lower():
-                    return {"success": True, "service": row}
+            _, by_name = CatalogService._get_catalog()
+            row = by_name.get(service_name.lower())
+            if row is not None:
+                return {"success": True, "service": row}
             return {"success": False, "error": "Servicio no encontrado"}
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
@@ -1,24 +1,155 @@
-import gspread
-from google.oauth2.service_account import Credentials
-import pytz
+from cachetools import TTLCache
+from gspread.exceptions import APIError
+from gspread.utils import InsertDataOption, ValueInputOption, rowcol_to_a1
 from datetime import datetime
+from zoneinfo import ZoneInfo
 import shortuuid
 import os
-from dotenv import load_dotenv
+import threading
+from config import get_config
+from services.google_sheet.sheets_client import (
+    get_worksheet,
+    reset_worksheet_on_error,
+    to_record,
+)
 
-load_dotenv()
-
-SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
-SCOPES = [os.getenv("SCOPES", "https://www.googleapis.com/auth/spreadsheets")]
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 SHEET_NAME = os.getenv("SHEET_NAME", "Lead")
 TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
+_TZ = ZoneInfo(TIMEZONE)
+_SUID = shortuuid.ShortUUID()
+
+# Columnas: Id | Nombre | Telefono | Correo | Tipo | Estado | Nota | Usuario | Canal | Fecha Creacion | Fecha Conversion | Thread_Id
+COL_MAP = {
+    "Id": 1,
+    "Nombre": 2,
+    "Telefono": 3,
+    "Correo": 4,
+    "Tipo": 5,
+    "Estado": 6,
+    "Nota": 7,
+    "Usuario": 8,
+    "Canal": 9,
+    "Fecha Creacion": 10,
+    "Fecha Conversion": 11,
+    "Thread_Id": 12,
+}
+
+# Tipos que la API acepta como valor de celda en `update_clients_batch`
+_CELL_TYPES = (str, int, float, bool)
+
+# Columnas usadas para buscar clientes: se leen solas en lugar de toda la hoja
+INDEX_COLUMNS = ("Id", "Telefono", "Correo", "Usuario")
+_INDEX_RANGES = [
+    "{0}2:{0}".format(rowcol_to_a1(1, COL_MAP[name])[:-1]) for name in INDEX_COLUMNS
+]
+
+
+class _DigitsOnly(dict):
+    """Tabla para `str.translate` que conserva solo los dígitos (como `str.isdigit`)."""
+
+    def __missing__(self, code):
+        value = code if chr(code).isdigit() else None
+        self[code] = value
+        return value
+
+
+_DIGITS_ONLY = _DigitsOnly()
 
-creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-gc = gspread.authorize(creds)
+
+def _digits(value) -> str:
+    """Equivalente a `"".join(filter(str.isdigit, str(value)))`, resuelto en C."""
+    return str(value).translate(_DIGITS_ONLY)
+
+
+# Índice de búsqueda de clientes: se comparte entre llamadas durante CRM_INDEX_TTL segundos
+CRM_INDEX_TTL = get_config().crm_index_ttl
+_index_cache = TTLCache(maxsize=1, ttl=CRM_INDEX_TTL)
+_index_lock = threading.Lock()
 
 
 class CRMService:
+    @staticmethod
+    def _get_worksheet():
+        """Handle cacheado de la hoja de clientes."""
+        return get_worksheet(SPREADSHEET_ID, SHEET_NAME)
+
+    @staticmethod
+    def _load_index(worksheet) -> dict:
+        """
+        Lee solo las columnas de búsqueda (Id, Telefono, Correo, Usuario) con un
+        único `batch_get` y arma los índices por Id, teléfono normalizado, correo
+        en minúsculas y usuario. Cada índice apunta a la primera fila (número de
+        fila de la hoja) con ese valor.
+        """
+        value_ranges = worksheet.batch_get(_INDEX_RANGES)
+        columns = [[cell[0] if cell else "" for cell in vr] for vr in value_ranges]
+        length = max(map(len, columns), default=0)
+        index = {
+            name: values + [""] * (length - len(values))
+            for name, values in zip(INDEX_COLUMNS, columns)
+        }
+        for key, name, normalize in (
+            ("by_id", "Id", str),
+            ("by_phone", "Telefono", _digits),
+            ("by_email", "Correo", str.lower),
+            ("by_user", "Usuario", str),
+        ):
+            lookup = {}
+            for idx, value in enumerate(index[name], start=2):
+                # Las celdas vacías no identifican a nadie: no se indexan
+                value = normalize(value)
+                if value:
+                    lookup.setdefault(value, idx)
+            index[key] = lookup
+        return index
+
+    @staticmethod
+    def _get_index(worksheet, fresh: bool = False) -> dict:
+        """
+        Retorna el índice de clientes cacheado durante CRM_INDEX_TTL segundos.
+        Con `fresh=True` se relee la hoja (las escrituras siempre usan filas
+        actualizadas, por si alguien reordenó la hoja a mano).
+        """
+        if not fresh:
+            with _index_lock:
+                index = _index_cache.get("index")
+            if index is not None:
+                return index
+        index = CRMService._load_index(worksheet)
+        with _index_lock:
+            _index_cache["index"] = index
+        return index
+
+    @staticmethod
+    def clear_index():
+        """Invalida el índice de clientes (usar tras modificar la hoja)."""
+        with _index_lock:
+            _index_cache.clear()
+
+    @staticmethod
+    def _get_row_record(worksheet, idx: int) -> dict:
+        """Lee una sola fila y la retorna como dict {columna: valor}."""
+        values = worksheet.row_values(idx)
+        values += [""] * (len(COL_MAP) - len(values))
+        return dict(zip(COL_MAP, values))
+
+    @staticmethod
+    def _find_client_row(index: dict, client_id_or_phone: str) -> tuple:
+        """
+        Busca un cliente por Id o teléfono en el índice.
+        Retorna (número de fila, Id del cliente) o (None, None) si no existe.
+        """
+        rows = [index["by_id"].get(str(client_id_or_phone))]
+        phone_norm = _digits(client_id_or_phone)
+        if phone_norm:
+            rows.append(index["by_phone"].get(phone_norm))
+        rows = [idx for idx in rows if idx is not None]
+        if not rows:
+            return None, None
+        idx = min(rows)
+        return idx, index["Id"][idx - 2]
+
     @staticmethod
     def resolve_client_id(client_id_or_phone: str) -> str | None:
         """
@@ -28,67 +159,76 @@ class CRMService:
         if not client_id_or_phone:
             return None
 
-        sh = gc.open_by_key(SPREADSHEET_ID)
-        worksheet = sh.worksheet(SHEET_NAME)
-        all_records = worksheet.get_all_records()
-        phone_norm = "".join(filter(str.isdigit, str(client_id_or_phone)))
+        worksheet = CRMService._get_worksheet()
+        index = CRMService._get_index(worksheet)
+        _, client_id = CRMService._find_client_row(index, client_id_or_phone)
+        return client_id
 
-        for row in all_records:
-            if str(row.get("Id")) == str(client_id_or_phone):
-                return row.get("Id")
-            if "".join(filter(str.isdigit, str(row.get("Telefono")))) == phone_norm:
-                return row.get("Id")
-        return None
+    @staticmethod
+    def _match_client(index: dict, telefono, correo, usuario) -> tuple:
+        """
+        Busca al cliente por teléfono, correo y usuario, en ese orden de
+        prioridad. Retorna (número de fila, criterio) del primer identificador
+        que coincide, o (None, None) si ninguno coincide.
+        """
+        telefono_norm = _digits(telefono) if telefono else ""
+        lookups = (
+            ("telefono", "by_phone", telefono_norm),
+            ("correo", "by_email", str(correo).lower() if correo else ""),
+            ("usuario", "by_user", str(usuario) if usuario else ""),
+        )
+        for matched_by, key, value in lookups:
+            idx = index[key].get(value) if value else None
+            if idx is not None:
+                return idx, matched_by
+        return None, None
 
     @staticmethod
     def verify_client(telefono=None, correo=None, usuario=None) -> dict:
         """
         Verifica si un cliente existe en el CRM usando teléfono, correo o usuario.
+        Busca en el índice cacheado y solo descarga la fila del cliente encontrado.
         """
         try:
             if not telefono and not correo and not usuario:
                 return {"error": "Debe proporcionar al menos un identificador"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME)
-            all_records = worksheet.get_all_records()
-            telefono_norm = (
-                "".join(filter(str.isdigit, str(telefono))) if telefono else ""
-            )
+            worksheet = CRMService._get_worksheet()
+            index = CRMService._get_index(worksheet)
+            idx, matched_by = CRMService._match_client(index, telefono, correo, usuario)
+            row = CRMService._get_row_record(worksheet, idx) if idx else None
 
-            for row in all_records:
-                matched_by = None
-                if (
-                    telefono
-                    and "".join(filter(str.isdigit, str(row.get("Telefono"))))
-                    == telefono_norm
-                ):
-                    matched_by = "telefono"
-                elif correo and str(row.get("Correo")).lower() == str(correo).lower():
-                    matched_by = "correo"
-                elif usuario and str(row.get("Usuario")) == str(usuario):
-                    matched_by = "usuario"
-
-                if matched_by:
-                    return {
-                        "exists": True,
-                        "client_id": row.get("Id"),
-                        "nombre": row.get("Nombre"),
-                        "telefono": row.get("Telefono"),
-                        "correo": row.get("Correo"),
-                        "tipo": row.get("Tipo"),
-                        "estado": row.get("Estado"),
-                        "canal": row.get("Canal"),
-                        "nota": row.get("Nota"),
-                        "usuario": row.get("Usuario"),
-                        "fecha_creacion": row.get("Fecha Creacion"),
-                        "fecha_conversion": row.get("Fecha Conversion"),
-                        "matched_by": matched_by,
-                    }
+            # Si la fila cambió desde que se armó el índice, se busca de nuevo
+            if row is not None and row.get("Id") != index["Id"][idx - 2]:
+                index = CRMService._get_index(worksheet, fresh=True)
+                idx, matched_by = CRMService._match_client(
+                    index, telefono, correo, usuario
+                )
+                row = CRMService._get_row_record(worksheet, idx) if idx else None
+
+            if row is not None:
+                # Mismos tipos que devolvía get_all_records (números como int/float)
+                row = to_record(COL_MAP, row.values())
+                return {
+                    "exists": True,
+                    "client_id": row.get("Id"),
+                    "nombre": row.get("Nombre"),
+                    "telefono": row.get("Telefono"),
+                    "correo": row.get("Correo"),
+                    "tipo": row.get("Tipo"),
+                    "estado": row.get("Estado"),
+                    "canal": row.get("Canal"),
+                    "nota": row.get("Nota"),
+                    "usuario": row.get("Usuario"),
+                    "fecha_creacion": row.get("Fecha Creacion"),
+                    "fecha_conversion": row.get("Fecha Conversion"),
+                    "matched_by": matched_by,
+                }
 
             return {"exists": False, "client_id": None}
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"error": str(e)}
 
     @staticmethod
@@ -112,27 +252,33 @@ class CRMService:
                 }
 
             # Crear cliente nuevo
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME)
-            all_records = worksheet.get_all_records()
-            tz = pytz.timezone(TIMEZONE)
-            fecha_actual = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
-
-            client_id = shortuuid.ShortUUID().random(length=6)
-            next_row = len(all_records) + 2
-
-            worksheet.update_cell(next_row, 1, client_id)
-            worksheet.update_cell(next_row, 2, nombre)
-            worksheet.update_cell(next_row, 3, telefono or "")
-            worksheet.update_cell(next_row, 4, correo or "")
-            worksheet.update_cell(next_row, 5, "Lead")
-            worksheet.update_cell(next_row, 6, "Nuevo")
-            worksheet.update_cell(next_row, 7, nota or "")
-            worksheet.update_cell(next_row, 8, usuario or "")
-            worksheet.update_cell(next_row, 9, canal)
-            worksheet.update_cell(next_row, 10, fecha_actual)
-            worksheet.update_cell(next_row, 11, "")
-            worksheet.update_cell(next_row, 12, "")
+            worksheet = CRMService._get_worksheet()
+            fecha_actual = datetime.now(_TZ).strftime("%Y-%m-%d %H:%M:%S")
+
+            client_id = _SUID.random(length=6)
+            row = [
+                client_id,
+                nombre,
+                telefono or "",
+                correo or "",
+                "Lead",
+                "Nuevo",
+                nota or "",
+                usuario or "",
+                canal,
+                fecha_actual,
+                "",
+                "",
+            ]
+            # Se agrega al final de la tabla del lado del servidor: sin lecturas
+            # previas y sin pisar filas si dos altas llegan a la vez
+            worksheet.append_row(
+                row,
+                value_input_option=ValueInputOption.user_entered,
+                insert_data_option=InsertDataOption.insert_rows,
+                table_range="A1",
+            )
+            CRMService.clear_index()
 
             return {
                 "success": True,
@@ -143,6 +289,7 @@ class CRMService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -156,50 +303,171 @@ class CRMService:
             if not fields:
                 return {"success": False, "error": "No se proporcionaron campos"}
 
-            resolved_id = CRMService.resolve_client_id(client_id)
-            if not resolved_id:
+            worksheet = CRMService._get_worksheet()
+            index = CRMService._get_index(worksheet, fresh=True)
+
+            idx, resolved_id = CRMService._find_client_row(index, client_id)
+            if resolved_id is None:
                 return {
                     "success": False,
                     "error": f"No se encontró cliente con ID o teléfono '{client_id}'",
                 }
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME)
-            all_records = worksheet.get_all_records()
+            data = []
             updated_fields = []
+            for key, value in fields.items():
+                col = COL_MAP.get(key)
+                if col:
+                    data.append({"range": rowcol_to_a1(idx, col), "values": [[value]]})
+                    updated_fields.append(key)
 
-            col_map = {
-                "Id": 1,
-                "Nombre": 2,
-                "Telefono": 3,
-                "Correo": 4,
-                "Tipo": 5,
-                "Estado": 6,
-                "Nota": 7,
-                "Usuario": 8,
-                "Canal": 9,
-                "Fecha Creacion": 10,
-                "Fecha Conversion": 11,
-                "Thread_Id": 12,
+            if data:
+                worksheet.batch_update(
+                    data, value_input_option=ValueInputOption.user_entered
+                )
+                CRMService.clear_index()
+            return {
+                "success": True,
+                "client_id": resolved_id,
+                "updated_fields": updated_fields,
             }
 
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id")) == str(resolved_id):
-                    for key, value in fields.items():
-                        col = col_map.get(key)
-                        if col:
-                            worksheet.update_cell(idx, col, value)
-                            updated_fields.append(key)
-                    return {
+        except Exception as e:
+            reset_worksheet_on_error(e)
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def update_clients_batch(updates: list) -> list:
+        """
+        Aplica varias actualizaciones de clientes con una sola lectura de la hoja
+        y un único `batch_update`.
+
+        Args:
+            updates: Lista de tuplas (client_id, fields); client_id puede ser
+                el Id interno o el teléfono del cliente.
+
+        Returns:
+            list: Un resultado por actualización, en el mismo orden y con el
+                mismo formato que `update_client_dynamic`.
+        """
+        try:
+            worksheet = CRMService._get_worksheet()
+            index = CRMService._get_index(worksheet, fresh=True)
+
+            results = []
+            pending = []  # (posición en results, rangos de esa actualización)
+            for client_id, fields in updates:
+                if not client_id:
+                    results.append({"success": False, "error": "client_id requerido"})
+                    continue
+                if not fields:
+                    results.append(
+                        {"success": False, "error": "No se proporcionaron campos"}
+                    )
+                    continue
+                invalid = [
+                    key
+                    for key, value in fields.items()
+                    if value is not None and not isinstance(value, _CELL_TYPES)
+                ]
+                if invalid:
+                    results.append(
+                        {
+                            "success": False,
+                            "error": f"Valores inválidos para: {', '.join(map(str, invalid))}",
+                        }
+                    )
+                    continue
+
+                idx, resolved_id = CRMService._find_client_row(index, client_id)
+                if resolved_id is None:
+                    results.append(
+                        {
+                            "success": False,
+                            "error": f"No se encontró cliente con ID o teléfono '{client_id}'",
+                        }
+                    )
+                    continue
+
+                data = []
+                updated_fields = []
+                for key, value in fields.items():
+                    col = COL_MAP.get(key)
+                    if col:
+                        data.append(
+                            {"range": rowcol_to_a1(idx, col), "values": [[value]]}
+                        )
+                        updated_fields.append(key)
+                if data:
+                    pending.append((len(results), data))
+                results.append(
+                    {
                         "success": True,
                         "client_id": resolved_id,
                         "updated_fields": updated_fields,
                     }
+                )
+
+            if pending:
+                try:
+                    worksheet.batch_update(
+                        [entry for _, data in pending for entry in data],
+                        value_input_option=ValueInputOption.user_entered,
+                    )
+                except APIError as e:
+                    # El batch es atómico: si la API rechazó una actualización
+                    # (400), se reintenta cada una por separado para que el error
+                    # quede solo en la que corresponde
+                    if e.response.status_code != 400 or len(pending) == 1:
+                        raise
+                    for position, data in pending:
+                        try:
+                            worksheet.batch_update(
+                                data, value_input_option=ValueInputOption.user_entered
+                            )
+                        except APIError as item_error:
+                            results[position] = {
+                                "success": False,
+                                "error": str(item_error),
+                            }
+                CRMService.clear_index()
+            return results
+
+        except Exception as e:
+            reset_worksheet_on_error(e)
+            return [{"success": False, "error": str(e)} for _ in updates]
+
+    @staticmethod
+    def update_single_field(client_id: str, column: str, value) -> dict:
+        """
+        Actualiza una sola columna de un cliente (p. ej. "Nota" o "Estado")
+        con una lectura de la hoja y una única escritura de celda.
+        """
+        try:
+            if not client_id:
+                return {"success": False, "error": "client_id requerido"}
+            col = COL_MAP.get(column)
+            if not col:
+                return {"success": False, "error": f"Columna inválida '{column}'"}
+
+            worksheet = CRMService._get_worksheet()
+            index = CRMService._get_index(worksheet, fresh=True)
 
+            idx, resolved_id = CRMService._find_client_row(index, client_id)
+            if resolved_id is None:
+                return {
+                    "success": False,
+                    "error": f"No se encontró cliente con ID o teléfono '{client_id}'",
+                }
+
+            worksheet.update_cell(idx, col, value)
+            CRMService.clear_index()
             return {
-                "success": False,
-                "error": f"Cliente con ID '{resolved_id}' no encontrado",
+                "success": True,
+                "client_id": resolved_id,
+                "updated_fields": [column],
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
@@ -1,29 +1,84 @@
-import gspread
-from google.oauth2.service_account import Credentials
-import pytz
+from gspread.utils import InsertDataOption, ValueInputOption, rowcol_to_a1
 from datetime import datetime
+from zoneinfo import ZoneInfo
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import config  # noqa: F401  (carga .env una sola vez)
+from services.google_sheet.sheets_client import (
+    fetch_sheet,
+    get_worksheet,
+    invalidate_sheet,
+    reset_worksheet_on_error,
+    to_record,
+)
 
 # ==========================
 # 🔧 CONFIGURACIÓN
 # ==========================
-SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
-SCOPES = [os.getenv("SCOPES", "https://www.googleapis.com/auth/spreadsheets")]
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 SHEET_NAME_MEETINGS = os.getenv("SHEET_NAME_MEETINGS", "Meetings")
 TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
-
-creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-gc = gspread.authorize(creds)
+_TZ = ZoneInfo(TIMEZONE)
+
+# Columnas: Id | Asunto | Detalles | Fecha Inicio | Meet_Link | Calendar_Link | Estado | Fecha Creada | Id Cliente
+COL_MAP = {
+    "Id": 1,
+    "Asunto": 2,
+    "Detalles": 3,
+    "Fecha Inicio": 4,
+    "Meet_Link": 5,
+    "Calendar_Link": 6,
+    "Estado": 7,
+    "Fecha Creada": 8,
+    "Id Cliente": 9,
+}
+
+# Índices ({Id: número de fila}, {Id Cliente: [filas]}) del último contenido
+# leído con `fetch_sheet`; se rearman solo cuando el caché entrega filas nuevas
+_meeting_index = (None, {}, {})
 
 
 # ==========================
 # 🧩 SERVICIO DE REUNIONES
 # ==========================
 class MeetingService:
+    @staticmethod
+    def _get_worksheet():
+        """Handle cacheado de la hoja de reuniones."""
+        return get_worksheet(SPREADSHEET_ID, SHEET_NAME_MEETINGS)
+
+    @staticmethod
+    def _load_indexed(worksheet) -> tuple:
+        """
+        Lee la hoja cacheada y retorna sus índices de búsqueda por posición de
+        columna: (encabezados, filas, {Id: número de fila}, {Id Cliente: [filas]}).
+        Los índices se arman una vez por contenido cacheado, no en cada consulta.
+        """
+        global _meeting_index
+        header, rows = fetch_sheet(worksheet)
+        source, by_id, by_client = _meeting_index
+        if source is not rows:
+            id_col = header.index("Id")
+            client_col = header.index("Id Cliente")
+            by_id = {}
+            by_client = {}
+            for idx, row in enumerate(rows, start=2):
+                by_id.setdefault(row[id_col], idx)
+                by_client.setdefault(row[client_col], []).append(row)
+            _meeting_index = (rows, by_id, by_client)
+        return header, rows, by_id, by_client
+
+    @staticmethod
+    def _find_row(worksheet, calendar_id: str):
+        """
+        Número de fila de la reunión leyendo solo la columna Id (siempre
+        actualizada, para escrituras). Retorna None si no existe.
+        """
+        ids = worksheet.col_values(COL_MAP["Id"])
+        try:
+            return ids.index(str(calendar_id), 1) + 1
+        except ValueError:
+            return None
+
     @staticmethod
     def create_meeting(
         calendar_id: str,
@@ -46,24 +101,29 @@ class MeetingService:
                     "error": "Campos requeridos: calendar_id, asunto, fecha_inicio e id_cliente",
                 }
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
-
-            tz = pytz.timezone(TIMEZONE)
-            fecha_creada = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
-            next_row = len(all_records) + 2
-
-            # Columnas: Id | Asunto | Detalles | Fecha Inicio | Meet_Link | Calendar_Link | Estado | Fecha Creada | Id Cliente
-            worksheet.update_cell(next_row, 1, calendar_id)
-            worksheet.update_cell(next_row, 2, asunto)
-            worksheet.update_cell(next_row, 3, detalles or "")
-            worksheet.update_cell(next_row, 4, fecha_inicio)
-            worksheet.update_cell(next_row, 5, meet_link or "")
-            worksheet.update_cell(next_row, 6, calendar_link or "")
-            worksheet.update_cell(next_row, 7, estado)
-            worksheet.update_cell(next_row, 8, fecha_creada)
-            worksheet.update_cell(next_row, 9, id_cliente)
+            worksheet = MeetingService._get_worksheet()
+
+            fecha_creada = datetime.now(_TZ).strftime("%Y-%m-%d %H:%M:%S")
+
+            row = [
+                calendar_id,
+                asunto,
+                detalles or "",
+                fecha_inicio,
+                meet_link or "",
+                calendar_link or "",
+                estado,
+                fecha_creada,
+                id_cliente,
+            ]
+            # Una sola escritura; la fila libre la resuelve Sheets
+            worksheet.append_row(
+                row,
+                value_input_option=ValueInputOption.user_entered,
+                insert_data_option=InsertDataOption.insert_rows,
+                table_range="A1",
+            )
+            invalidate_sheet(worksheet)
 
             return {
                 "success": True,
@@ -76,6 +136,7 @@ class MeetingService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     # ==========================
@@ -88,13 +149,12 @@ class MeetingService:
             if not calendar_id:
                 return {"success": False, "error": "calendar_id requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
+            worksheet = MeetingService._get_worksheet()
+            header, rows, by_id, _ = MeetingService._load_indexed(worksheet)
 
-            for row in all_records:
-                if str(row.get("Id")) == str(calendar_id):
-                    return {"success": True, "meeting": row}
+            idx = by_id.get(str(calendar_id))
+            if idx is not None:
+                return {"success": True, "meeting": to_record(header, rows[idx - 2])}
 
             return {
                 "success": False,
@@ -102,6 +162,7 @@ class MeetingService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -111,19 +172,17 @@ class MeetingService:
             if not id_cliente:
                 return {"success": False, "error": "id_cliente requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
+            worksheet = MeetingService._get_worksheet()
+            header, _, _, by_client = MeetingService._load_indexed(worksheet)
 
             meetings = [
-                row
-                for row in all_records
-                if str(row.get("Id Cliente")) == str(id_cliente)
+                to_record(header, row) for row in by_client.get(str(id_cliente), [])
             ]
 
             return {"success": True, "count": len(meetings), "meetings": meetings}
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -133,15 +192,15 @@ class MeetingService:
             if not fecha_inicio:
                 return {"success": False, "error": "fecha_inicio requerida"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
+            worksheet = MeetingService._get_worksheet()
+            header, rows = fetch_sheet(worksheet)
+            fecha_col = header.index("Fecha Inicio")
 
             fecha_busqueda = fecha_inicio[:10]
             meetings = [
-                row
-                for row in all_records
-                if str(row.get("Fecha Inicio"))[:10] == fecha_busqueda
+                to_record(header, row)
+                for row in rows
+                if row[fecha_col][:10] == fecha_busqueda
             ]
 
             return {
@@ -152,6 +211,7 @@ class MeetingService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     # ==========================
@@ -166,33 +226,24 @@ class MeetingService:
             if not fields:
                 return {"success": False, "error": "No se proporcionaron campos"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
-
-            col_map = {
-                "Id": 1,
-                "Asunto": 2,
-                "Detalles": 3,
-                "Fecha Inicio": 4,
-                "Meet_Link": 5,
-                "Calendar_Link": 6,
-                "Estado": 7,
-                "Fecha Creada": 8,
-                "Id Cliente": 9,
-            }
-
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id")) == str(calendar_id):
-                    for key, value in fields.items():
-                        col = col_map.get(key)
-                        if col:
-                            worksheet.update_cell(idx, col, value)
-                    return {
-                        "success": True,
-                        "calendar_id": calendar_id,
-                        "updated_fields": list(fields.keys()),
-                    }
+            worksheet = MeetingService._get_worksheet()
+            idx = MeetingService._find_row(worksheet, calendar_id)
+            if idx is not None:
+                data = [
+                    {"range": rowcol_to_a1(idx, col), "values": [[value]]}
+                    for key, value in fields.items()
+                    if (col := COL_MAP.get(key))
+                ]
+                if data:
+                    worksheet.batch_update(
+                        data, value_input_option=ValueInputOption.user_entered
+                    )
+                    invalidate_sheet(worksheet)
+                return {
+                    "success": True,
+                    "calendar_id": calendar_id,
+                    "updated_fields": list(fields.keys()),
+                }
 
             return {
                 "success": False,
@@ -200,6 +251,7 @@ class MeetingService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -209,17 +261,15 @@ class MeetingService:
             if not calendar_id:
                 return {"success": False, "error": "calendar_id requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_MEETINGS)
-            all_records = worksheet.get_all_records()
-
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id")) == str(calendar_id):
-                    worksheet.delete_rows(idx)
-                    return {
-                        "success": True,
-                        "message": f"Reunión '{calendar_id}' eliminada",
-                    }
+            worksheet = MeetingService._get_worksheet()
+            idx = MeetingService._find_row(worksheet, calendar_id)
+            if idx is not None:
+                worksheet.delete_rows(idx)
+                invalidate_sheet(worksheet)
+                return {
+                    "success": True,
+                    "message": f"Reunión '{calendar_id}' eliminada",
+                }
 
             return {
                 "success": False,
@@ -227,4 +277,5 @@ class MeetingService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
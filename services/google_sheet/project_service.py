@@ -1,29 +1,92 @@
-import gspread
-from google.oauth2.service_account import Credentials
-import pytz
+from gspread.utils import InsertDataOption, ValueInputOption, rowcol_to_a1
 from datetime import datetime
+from itertools import zip_longest
+from zoneinfo import ZoneInfo
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import config  # noqa: F401  (carga .env una sola vez)
+from services.google_sheet.sheets_client import (
+    fetch_sheet,
+    get_worksheet,
+    invalidate_sheet,
+    reset_worksheet_on_error,
+    to_record,
+)
 
 # ==========================
 # 🔧 CONFIGURACIÓN
 # ==========================
-SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
-SCOPES = [os.getenv("SCOPES", "https://www.googleapis.com/auth/spreadsheets")]
 SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
 SHEET_NAME_PROJECTS = os.getenv("SHEET_NAME_PROJECTS", "Projects")
 TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
-
-creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-gc = gspread.authorize(creds)
+_TZ = ZoneInfo(TIMEZONE)
+
+# Columnas: Id | Nombre | Descripcion | Servicio | Estado | Nota | Fecha_Inicio | Fecha_Fin | Id_Cliente
+COL_MAP = {
+    "Id": 1,
+    "Nombre": 2,
+    "Descripcion": 3,
+    "Servicio": 4,
+    "Estado": 5,
+    "Nota": 6,
+    "Fecha_Inicio": 7,
+    "Fecha_Fin": 8,
+    "Id_Cliente": 9,
+}
+
+# Columnas que lee `update_project_note_by_client` (desde la fila 2)
+_CLIENT_RANGES = [
+    "{0}2:{0}".format(rowcol_to_a1(1, COL_MAP[name])[:-1])
+    for name in ("Id", "Id_Cliente")
+]
+
+# Índice {Id_Cliente: [filas]} del último contenido leído con `fetch_sheet`;
+# se rearma solo cuando el caché de la hoja entrega filas nuevas
+_client_index = (None, {})
 
 
 # ==========================
 # 🧩 SERVICIO DE PROYECTOS
 # ==========================
 class ProjectService:
+    @staticmethod
+    def _get_worksheet():
+        """Handle cacheado de la hoja de proyectos."""
+        return get_worksheet(SPREADSHEET_ID, SHEET_NAME_PROJECTS)
+
+    @staticmethod
+    def _load_by_client(worksheet) -> tuple:
+        """Retorna (encabezados, {Id_Cliente: [filas]}) desde la hoja cacheada."""
+        global _client_index
+        header, rows = fetch_sheet(worksheet)
+        source, index = _client_index
+        if source is not rows:
+            client_col = header.index("Id_Cliente")
+            index = {}
+            for row in rows:
+                index.setdefault(row[client_col], []).append(row)
+            _client_index = (rows, index)
+        return header, index
+
+    @staticmethod
+    def _find_row(worksheet, project_id: str):
+        """
+        Número de fila del proyecto leyendo solo la columna Id.
+        Retorna None si no existe.
+        """
+        ids = worksheet.col_values(COL_MAP["Id"])
+        try:
+            return ids.index(str(project_id), 1) + 1
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _get_row_record(worksheet, idx: int) -> dict:
+        """Lee encabezados y una fila en un solo request y los arma como dict."""
+        header_range, row_range = worksheet.batch_get(["1:1", f"{idx}:{idx}"])
+        header = header_range[0] if header_range else []
+        row = row_range[0] if row_range else []
+        return to_record(header, row)
+
     @staticmethod
     def create_project(
         nombre: str,
@@ -62,27 +125,34 @@ class ProjectService:
                     "error": "Campos requeridos: nombre e id_cliente",
                 }
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
+            worksheet = ProjectService._get_worksheet()
 
-            tz = pytz.timezone(TIMEZONE)
-            fecha_creada = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+            now = datetime.now(_TZ)
+            fecha_creada = now.strftime("%Y-%m-%d %H:%M:%S")
 
-            # Generar ID único basado en timestamp
-            project_id = f"PRJ-{datetime.now(tz).strftime('%Y%m%d%H%M%S')}"
-            next_row = len(all_records) + 2
+            # Generar ID único basado en timestamp (el mismo instante de creación)
+            project_id = f"PRJ-{now:%Y%m%d%H%M%S}"
 
             # Columnas: Id | Nombre | Descripcion | Servicio | Estado | Nota | Fecha_Inicio | Fecha_Fin | Id_Cliente
-            worksheet.update_cell(next_row, 1, project_id)
-            worksheet.update_cell(next_row, 2, nombre)
-            worksheet.update_cell(next_row, 3, descripcion or "")
-            worksheet.update_cell(next_row, 4, servicio or "")
-            worksheet.update_cell(next_row, 5, estado)
-            worksheet.update_cell(next_row, 6, nota or "")
-            worksheet.update_cell(next_row, 7, fecha_inicio or fecha_creada)
-            worksheet.update_cell(next_row, 8, fecha_fin or "")
-            worksheet.update_cell(next_row, 9, id_cliente)
+            row = [
+                project_id,
+                nombre,
+                descripcion or "",
+                servicio or "",
+                estado,
+                nota or "",
+                fecha_inicio or fecha_creada,
+                fecha_fin or "",
+                id_cliente,
+            ]
+            # Una sola escritura; la fila libre la resuelve Sheets
+            worksheet.append_row(
+                row,
+                value_input_option=ValueInputOption.user_entered,
+                insert_data_option=InsertDataOption.insert_rows,
+                table_range="A1",
+            )
+            invalidate_sheet(worksheet)
 
             return {
                 "success": True,
@@ -94,6 +164,7 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     # ==========================
@@ -114,13 +185,11 @@ class ProjectService:
             if not project_id:
                 return {"success": False, "error": "project_id requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
-
-            for row in all_records:
-                if str(row.get("Id")) == str(project_id):
-                    return {"success": True, "project": row}
+            worksheet = ProjectService._get_worksheet()
+            idx = ProjectService._find_row(worksheet, project_id)
+            if idx is not None:
+                project = ProjectService._get_row_record(worksheet, idx)
+                return {"success": True, "project": project}
 
             return {
                 "success": False,
@@ -128,6 +197,7 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -145,19 +215,17 @@ class ProjectService:
             if not id_cliente:
                 return {"success": False, "error": "id_cliente requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
+            worksheet = ProjectService._get_worksheet()
+            header, by_client = ProjectService._load_by_client(worksheet)
 
             projects = [
-                row
-                for row in all_records
-                if str(row.get("Id_Cliente")) == str(id_cliente)
+                to_record(header, row) for row in by_client.get(str(id_cliente), [])
             ]
 
             return {"success": True, "count": len(projects), "projects": projects}
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -175,15 +243,15 @@ class ProjectService:
             if not fecha_inicio:
                 return {"success": False, "error": "fecha_inicio requerida"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
+            worksheet = ProjectService._get_worksheet()
+            header, rows = fetch_sheet(worksheet)
+            fecha_col = header.index("Fecha_Inicio")
 
             fecha_busqueda = fecha_inicio[:10]
             projects = [
-                row
-                for row in all_records
-                if str(row.get("Fecha_Inicio"))[:10] == fecha_busqueda
+                to_record(header, row)
+                for row in rows
+                if row[fecha_col][:10] == fecha_busqueda
             ]
 
             return {
@@ -194,6 +262,7 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     # ==========================
@@ -220,33 +289,30 @@ class ProjectService:
             if not fields:
                 return {"success": False, "error": "No se proporcionaron campos"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
-
-            col_map = {
-                "Id": 1,
-                "Nombre": 2,
-                "Descripcion": 3,
-                "Servicio": 4,
-                "Estado": 5,
-                "Nota": 6,
-                "Fecha_Inicio": 7,
-                "Fecha_Fin": 8,
-                "Id_Cliente": 9,
-            }
+            # Validar antes de llamar a la API: o se escriben todos o ninguno
+            invalid = [key for key in fields if key not in COL_MAP]
+            if invalid:
+                return {
+                    "success": False,
+                    "error": f"Campos inválidos: {', '.join(map(str, invalid))}",
+                }
 
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id")) == str(project_id):
-                    for key, value in fields.items():
-                        col = col_map.get(key)
-                        if col:
-                            worksheet.update_cell(idx, col, value)
-                    return {
-                        "success": True,
-                        "project_id": project_id,
-                        "updated_fields": list(fields.keys()),
-                    }
+            worksheet = ProjectService._get_worksheet()
+            idx = ProjectService._find_row(worksheet, project_id)
+            if idx is not None:
+                data = [
+                    {"range": rowcol_to_a1(idx, COL_MAP[key]), "values": [[value]]}
+                    for key, value in fields.items()
+                ]
+                worksheet.batch_update(
+                    data, value_input_option=ValueInputOption.user_entered
+                )
+                invalidate_sheet(worksheet)
+                return {
+                    "success": True,
+                    "project_id": project_id,
+                    "updated_fields": list(fields.keys()),
+                }
 
             return {
                 "success": False,
@@ -254,6 +320,7 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -274,25 +341,42 @@ class ProjectService:
             if not nota:
                 return {"success": False, "error": "nota requerida"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
+            worksheet = ProjectService._get_worksheet()
+            # Id e Id_Cliente en un solo batch_get, sin descargar la hoja
+            ids, clients = (
+                [cell[0] if cell else "" for cell in value_range]
+                for value_range in worksheet.batch_get(_CLIENT_RANGES)
+            )
 
-            updated_count = 0
+            id_cliente = str(id_cliente)
+            data = []
             updated_projects = []
 
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id_Cliente")) == str(id_cliente):
-                    worksheet.update_cell(idx, 6, nota)  # Columna 6 = Nota
-                    updated_count += 1
-                    updated_projects.append(row.get("Id"))
-
+            for idx, (project_id, client) in enumerate(
+                zip_longest(ids, clients, fillvalue=""), start=2
+            ):
+                if client == id_cliente:
+                    data.append(
+                        {
+                            "range": rowcol_to_a1(idx, COL_MAP["Nota"]),
+                            "values": [[nota]],
+                        }
+                    )
+                    updated_projects.append(project_id)
+
+            updated_count = len(data)
             if updated_count == 0:
                 return {
                     "success": False,
                     "error": f"No se encontraron proyectos para el cliente '{id_cliente}'",
                 }
 
+            # Todas las notas en una sola escritura
+            worksheet.batch_update(
+                data, value_input_option=ValueInputOption.user_entered
+            )
+            invalidate_sheet(worksheet)
+
             return {
                 "success": True,
                 "id_cliente": id_cliente,
@@ -302,6 +386,7 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
 
     @staticmethod
@@ -319,17 +404,16 @@ class ProjectService:
             if not project_id:
                 return {"success": False, "error": "project_id requerido"}
 
-            sh = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = sh.worksheet(SHEET_NAME_PROJECTS)
-            all_records = worksheet.get_all_records()
-
-            for idx, row in enumerate(all_records, start=2):
-                if str(row.get("Id")) == str(project_id):
-                    worksheet.delete_rows(idx)
-                    return {
-                        "success": True,
-                        "message": f"Proyecto '{project_id}' eliminado",
-                    }
+            worksheet = ProjectService._get_worksheet()
+            idx = ProjectService._find_row(worksheet, project_id)
+            if idx is not None:
+                # delete_rows envía un único deleteDimension
+                worksheet.delete_rows(idx)
+                invalidate_sheet(worksheet)
+                return {
+                    "success": True,
+                    "message": f"Proyecto '{project_id}' eliminado",
+                }
 
             return {
                 "success": False,
@@ -337,4 +421,5 @@ class ProjectService:
             }
 
         except Exception as e:
+            reset_worksheet_on_error(e)
             return {"success": False, "error": str(e)}
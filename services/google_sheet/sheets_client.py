@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+import gspread
+from cachetools import TTLCache
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from gspread.utils import numericise_all
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from functools import lru_cache
+import os
+from config import get_config
+
+_config = get_config()
+
+SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "credentials.json")
+DEFAULT_SCOPES = ("https://www.googleapis.com/auth/spreadsheets",)
+# SCOPES admite varios valores separados por coma; vacío → scopes por defecto
+SCOPES = tuple(s for s in os.getenv("SCOPES", "").split(",") if s) or DEFAULT_SCOPES
+
+# Conexiones HTTPS reutilizables (las tools corren en paralelo en hilos)
+HTTP_POOL_SIZE = 16
+
+# Contenido de las hojas leídas con `fetch_sheet`, por SHEET_CACHE_TTL segundos
+SHEET_CACHE_TTL = _config.sheet_cache_ttl
+_values_cache = TTLCache(maxsize=32, ttl=SHEET_CACHE_TTL)
+_values_lock = threading.Lock()
+
+# Reintentos ante cuota excedida (429) o fallas transitorias del servidor.
+# Un 408/5xx en una escritura pudo haberse aplicado igual (append duplicado,
+# delete sobre filas ya corridas): solo las lecturas (GET) se reintentan ahí;
+# el 429 se rechaza antes de ejecutar y es seguro para cualquier método.
+SHEETS_MAX_RETRIES = _config.sheets_max_retries
+MAX_BACKOFF = 60
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+WRITE_RETRYABLE_STATUS = frozenset({429})
+
+# Cuota de Sheets por usuario: requests de lectura y de escritura por minuto.
+# SHEETS_BURST requests pueden salir juntos; el resto se reparte de modo que
+# ninguna ventana de 60 s supere la cuota.
+SHEETS_READS_PER_MINUTE = _config.sheets_reads_per_minute
+SHEETS_WRITES_PER_MINUTE = _config.sheets_writes_per_minute
+SHEETS_BURST = _config.sheets_burst
+
+
+class _TokenBucket:
+    """
+    Limitador compartido entre hilos. Arranca con `burst` tokens y repone
+    (per_minute - burst) por minuto: así ráfaga + reposición nunca superan
+    `per_minute` en 60 s, ni siquiera en el primer minuto.
+    """
+
+    def __init__(self, per_minute: int, burst: int = SHEETS_BURST):
+        burst = max(1, min(burst, per_minute - 1))
+        self.capacity = float(burst)
+        self.rate = max(per_minute - burst, 1) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            # Saldo negativo: el turno reservado llega en -tokens / rate segundos
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+_read_bucket = _TokenBucket(SHEETS_READS_PER_MINUTE)
+_write_bucket = _TokenBucket(SHEETS_WRITES_PER_MINUTE)
+
+
+class _BackoffHTTPClient(HTTPClient):
+    """
+    HTTPClient de gspread con reintentos y backoff exponencial (lecturas ante
+    408/429/5xx, escrituras solo ante 429). Respeta `Retry-After` si la API
+    lo envía; si no, espera 2**n + jitter (máximo MAX_BACKOFF segundos). El
+    estado es local a cada request, así que es seguro entre hilos. Cada
+    request pasa antes por el limitador de lecturas (GET) o de escrituras.
+    """
+
+    def request(self, *args, **kwargs):
+        method = args[0] if args else kwargs.get("method", "")
+        is_read = method.lower() == "get"
+        bucket = _read_bucket if is_read else _write_bucket
+        retryable = RETRYABLE_STATUS if is_read else WRITE_RETRYABLE_STATUS
+        # Solo el primer intento consume cuota del limitador: los reintentos ya
+        # esperan su backoff y no deben quitar turnos a requests nuevos
+        bucket.acquire()
+        for attempt in range(SHEETS_MAX_RETRIES + 1):
+            try:
+                return super().request(*args, **kwargs)
+            except APIError as e:
+                status = e.response.status_code
+                if status not in retryable or attempt == SHEETS_MAX_RETRIES:
+                    raise
+                retry_after = e.response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    wait = int(retry_after)
+                else:
+                    wait = 2**attempt + random.random()
+                time.sleep(min(wait, MAX_BACKOFF))
+
+
+@lru_cache(maxsize=1)
+def get_sheets_client() -> gspread.Client:
+    """
+    Retorna un cliente gspread compartido por todos los servicios de Sheets.
+    Reutiliza las credenciales y el pool de conexiones entre llamadas, evitando
+    un handshake TLS por request; los 429/5xx se reintentan con backoff.
+    """
+    creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    session = AuthorizedSession(creds)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return gspread.authorize(creds, http_client=_BackoffHTTPClient, session=session)
+
+
+@lru_cache(maxsize=None)
+def get_worksheet(spreadsheet_id: str, sheet_name: str) -> gspread.Worksheet:
+    """
+    Retorna el handle de una hoja, cacheado por (spreadsheet, nombre).
+    `open_by_key` y `worksheet` consultan metadatos en cada llamada; así se
+    hace una sola vez por proceso.
+    """
+    return get_sheets_client().open_by_key(spreadsheet_id).worksheet(sheet_name)
+
+
+def reset_worksheet_on_error(error: Exception) -> None:
+    """Descarta los handles cacheados si la API indica que ya no son válidos."""
+    if isinstance(error, APIError) and error.response.status_code in (401, 404):
+        get_worksheet.cache_clear()
+
+
+def fetch_sheet(worksheet, fresh: bool = False) -> tuple:
+    """
+    Lee toda la hoja con `get_all_values()` (listas, sin un dict por fila).
+    Retorna (encabezados, filas de datos); los dicts se arman solo para las
+    filas que se devuelven. El resultado se cachea por hoja y no debe mutarse;
+    con `fresh=True` se relee (las escrituras deben usar filas actualizadas).
+    """
+    key = (worksheet.spreadsheet_id, worksheet.id)
+    if not fresh:
+        with _values_lock:
+            cached = _values_cache.get(key)
+        if cached is not None:
+            return cached
+
+    values = worksheet.get_all_values()
+    result = (values[0], values[1:]) if values else ([], [])
+    with _values_lock:
+        _values_cache[key] = result
+    return result
+
+
+def invalidate_sheet(worksheet) -> None:
+    """Descarta el contenido cacheado de una hoja (usar tras modificarla)."""
+    with _values_lock:
+        _values_cache.pop((worksheet.spreadsheet_id, worksheet.id), None)
+
+
+def to_record(header, row) -> dict:
+    """
+    Arma el dict de una fila igual que `get_all_records()`: completa las celdas
+    faltantes con "" y convierte los valores numéricos a int/float.
+    """
+    row = list(row) + [""] * (len(header) - len(row))
+    return dict(zip(header, numericise_all(row, empty2zero=False, default_blank="")))
@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from services.google_calendar_meet.calendar_service import _TZ, CalendarService
+
+
+class _FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class _FakeFreeBusy:
+    """Simula freebusy.query: solo devuelve los bloques dentro de [timeMin, timeMax)."""
+
+    def __init__(self, busy):
+        self.busy = busy
+        self.body = None
+
+    def query(self, body):
+        self.body = body
+        time_min = datetime.fromisoformat(body["timeMin"])
+        time_max = datetime.fromisoformat(body["timeMax"])
+        busy = [
+            {"start": s.isoformat(), "end": e.isoformat()}
+            for s, e in self.busy
+            if s < time_max and e > time_min
+        ]
+        return _FakeRequest({"calendars": {"primary": {"busy": busy}}})
+
+
+class _FakeService:
+    def __init__(self, busy):
+        self._freebusy = _FakeFreeBusy(busy)
+
+    def freebusy(self):
+        return self._freebusy
+
+
+class CheckAvailabilityTest(unittest.TestCase):
+    def test_busy_block_on_last_candidate_day(self):
+        now = datetime.now(_TZ)
+        # Último día hábil dentro de la ventana de 14 días
+        last = max(
+            offset
+            for offset in range(14)
+            if (now.date() + timedelta(days=offset)).weekday() < 5
+        )
+        last_date = now.date() + timedelta(days=last)
+
+        def at(hour):
+            return datetime.combine(last_date, time(hour, 0), tzinfo=_TZ)
+
+        # Todo ocupado hasta el último día; ahí solo hay una reunión de 10 a 11
+        busy = [(now - timedelta(hours=1), at(8)), (at(10), at(11))]
+        service = _FakeService(busy)
+
+        with mock.patch.object(
+            CalendarService, "get_service", return_value=service
+        ), mock.patch.object(
+            CalendarService, "_execute", side_effect=lambda request: request.execute()
+        ):
+            disponibilidad = CalendarService.check_availability()
+
+        self.assertEqual(
+            datetime.fromisoformat(service._freebusy.body["timeMax"]), at(17)
+        )
+        self.assertEqual(len(disponibilidad), 1)
+        slots = [
+            (slot["inicio_iso"], slot["fin_iso"])
+            for slot in disponibilidad[0]["espacios_libres"]
+        ]
+        self.assertEqual(
+            slots,
+            [
+                (at(8).isoformat(), at(10).isoformat()),
+                (at(11).isoformat(), at(17).isoformat()),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,18 +5,19 @@ Guarda el token en la misma estructura que usa tu servidor.
 """
 
 import os
-import json
+import stat
+import orjson
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 
 # Mismo scopes que tu CalendarService
-SCOPES = [
+SCOPES = (
     "https://www.googleapis.com/auth/calendar",
     "https://www.googleapis.com/auth/calendar.events",
     "https://www.googleapis.com/auth/calendar.readonly",
     "https://www.googleapis.com/auth/meetings.space.created",
-]
+)
 
 
 def get_token(environment="production"):
@@ -83,19 +84,30 @@ def get_token(environment="production"):
             creds = flow.run_local_server(port=8080)
 
     # Crear directorio secrets si no existe
-    os.makedirs("secrets", exist_ok=True)
-
-    # Guardar el token
-    with open(token_path, "w") as token:
-        token_data = {
-            "token": creds.token,
-            "refresh_token": creds.refresh_token,
-            "token_uri": creds.token_uri,
-            "client_id": creds.client_id,
-            "client_secret": creds.client_secret,
-            "scopes": creds.scopes,
-        }
-        json.dump(token_data, token, indent=2)
+    if not os.path.isdir("secrets"):
+        os.makedirs("secrets", exist_ok=True)
+
+    # Guardar el token de forma atómica (tmp + os.replace): un corte a mitad
+    # de escritura no deja un token truncado. El archivo nuevo conserva los
+    # permisos del token anterior (0600 si no existía)
+    token_data = {
+        "token": creds.token,
+        "refresh_token": creds.refresh_token,
+        "token_uri": creds.token_uri,
+        "client_id": creds.client_id,
+        "client_secret": creds.client_secret,
+        "scopes": creds.scopes,
+    }
+    try:
+        mode = stat.S_IMODE(os.stat(token_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o600
+    tmp_path = f"{token_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as token:
+        os.fchmod(token.fileno(), mode)
+        token.write(orjson.dumps(token_data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, token_path)
 
     print(f"\n✅ Token guardado exitosamente en: {token_path}")
     print("🎉 Ahora tu servidor puede usar este token automáticamente.\n")